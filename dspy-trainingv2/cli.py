@@ -6,14 +6,21 @@ This script provides a command-line interface for optimizing OpenCode agent prom
 using DSPy and session logs.
 """
 
+import copy
 import logging
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml C parser
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
 try:
     import typer
     from rich.console import Console
@@ -24,36 +31,32 @@ except ImportError:
     print("Install with: pip install typer rich")
     sys.exit(1)
 
-try:
-    import dspy
-except ImportError:
-    print("Error: DSPy not installed.")
-    print("Install with: pip install dspy-ai")
-    sys.exit(1)
-
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env file if it exists
-try:
-    from dotenv import load_dotenv
-    load_dotenv()  # Load from .env in current directory
-    load_dotenv(Path(__file__).parent.parent / ".env")  # Also try parent directory
-    logger.debug("Loaded environment variables from .env file(s)")
-except ImportError:
-    logger.debug("python-dotenv not installed, skipping .env file loading")
-except Exception as e:
-    logger.debug(f"Error loading .env file: {e}")
-
-from src.data.session_parser import load_and_parse_sessions
-from src.data.example_builder import ExampleBuilder, split_examples
-from src.evaluation.metrics import composite_metric, correctness_metric, simple_metric
-from src.optimization.optimizer import PromptOptimizer, ExperimentTracker
-from src.export.opencode_exporter import OpenCodeExporter
+# DSPy and the src.* pipeline modules are imported inside train() so that
+# validate, clear-cache and --help start without loading DSPy/LiteLLM.
 
 app = typer.Typer(help="DSPy Prompt Optimizer for OpenCode")
 console = Console()
 
 
+@lru_cache(maxsize=1)
+def _load_env_once():
+    """Load environment variables from .env files (once per process, on demand)."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        logger.debug("python-dotenv not installed, skipping .env file loading")
+        return
+
+    try:
+        load_dotenv()  # Searches upward from this file's directory
+        load_dotenv(Path(__file__).parent.parent / ".env")  # Also try parent directory
+        logger.debug("Loaded environment variables from .env file(s)")
+    except Exception as e:
+        logger.debug(f"Error loading .env file: {e}")
+
+
 def setup_logging(config: dict):
     """Setup logging based on config."""
     log_config = config.get('logging', {})
@@ -72,14 +75,24 @@ def setup_logging(config: dict):
         logging.getLogger().addHandler(file_handler)
 
 
+@lru_cache(maxsize=8)
+def _parse_config(path: str, mtime_ns: int) -> dict:
+    """Parse a YAML config file (memoized on resolved path and mtime)."""
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+
 def load_config(config_path: str) -> dict:
     """Load configuration from YAML file."""
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+    path = Path(config_path).resolve()
+    # Callers may modify the returned dict, so hand out a copy of the cached parse
+    return copy.deepcopy(_parse_config(str(path), path.stat().st_mtime_ns))
 
 
 def get_metric(metric_name: str):
     """Get metric function by name."""
+    from src.evaluation.metrics import composite_metric, correctness_metric, simple_metric
+
     metrics = {
         'composite': composite_metric,
         'correctness': correctness_metric,
@@ -104,6 +117,21 @@ def train(
 ):
     """Run prompt optimization training."""
 
+    try:
+        import dspy
+    except ImportError:
+        print("Error: DSPy not installed.")
+        print("Install with: pip install dspy-ai")
+        raise typer.Exit(1)
+
+    from src.data.session_parser import load_and_parse_sessions
+    from src.data.example_builder import ExampleBuilder, split_examples
+    from src.optimization.optimizer import PromptOptimizer, ExperimentTracker
+    from src.export.opencode_exporter import OpenCodeExporter
+
+    # API keys may come from .env files
+    _load_env_once()
+
     # Load config
     cfg = load_config(str(config))
     setup_logging(cfg)
@@ -140,7 +168,10 @@ def train(
             min_correctness=cfg['data']['min_correctness'],
             min_efficiency=cfg['data']['min_efficiency'],
             require_success=cfg['data']['require_success'],
-            agent_filter=cfg['data']['agent_filter']
+            agent_filter=cfg['data']['agent_filter'],
+            cache_dir=cfg['data'].get('cache_dir'),
+            max_workers=cfg['data'].get('load_workers'),
+            use_processes=cfg['data'].get('load_processes', False)
         )
     except Exception as e:
         console.print(f"[red]Error loading sessions: {e}[/red]")
@@ -161,7 +192,11 @@ def train(
     console.print("\n[bold]Step 2: Converting to DSPy format...[/bold]")
 
     builder = ExampleBuilder()
-    dspy_examples = builder.build_batch(session_examples, include_labels=True)
+    dspy_examples = builder.build_batch(
+        session_examples,
+        include_labels=True,
+        max_workers=cfg['data'].get('build_workers', 1)
+    )
 
     console.print(f"[green]✓ Converted {len(dspy_examples)} examples to DSPy format[/green]")
 
@@ -204,12 +239,15 @@ def train(
             teacher_api_key=teacher_key,
             student_api_key=student_key,
             teacher_temperature=teacher_cfg.get('temperature', 0.0),
-            student_temperature=student_cfg.get('temperature', 0.0)
+            student_temperature=student_cfg.get('temperature', 0.0),
+            num_threads=cfg['evaluation'].get('num_threads', 1),
+            display_progress=cfg['evaluation'].get('display_progress', True),
+            reuse_teacher_cache=teacher_cfg.get('reuse_cache', False)
         )
     except Exception as e:
         console.print(f"[red]Error setting up optimizer: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        # Through the configured handlers, so the trace also reaches the log file
+        logger.error(f"Error setting up optimizer: {e}", exc_info=True)
         raise typer.Exit(1)
 
     console.print(f"[green]✓ Teacher: {teacher_cfg['model']} ({teacher_cfg.get('provider', 'openai')})[/green]")
@@ -241,7 +279,8 @@ def train(
                 metric=metric,
                 max_bootstrapped_demos=opt_cfg['max_bootstrapped_demos'],
                 max_labeled_demos=opt_cfg['max_labeled_demos'],
-                max_rounds=opt_cfg['max_rounds']
+                max_rounds=opt_cfg['max_rounds'],
+                metric_threshold=opt_cfg.get('metric_threshold')
             )
 
         elif optimizer == "mipro":
@@ -252,7 +291,8 @@ def train(
                 metric=metric,
                 num_candidates=opt_cfg['num_candidates'],
                 init_temperature=opt_cfg['init_temperature'],
-                minibatch_size=opt_cfg.get('minibatch_size', None)  # Auto-adjusts if not specified
+                minibatch_size=opt_cfg.get('minibatch_size', None),  # Auto-adjusts if not specified
+                metric_threshold=opt_cfg.get('metric_threshold')
             )
 
         elif optimizer == "copro":
@@ -285,8 +325,8 @@ def train(
 
     except Exception as e:
         console.print(f"[red]Error during optimization: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        # Through the configured handlers, so the trace also reaches the log file
+        logger.error(f"Error during optimization: {e}", exc_info=True)
         raise typer.Exit(1)
 
     # Step 7: Export prompts
@@ -361,18 +401,17 @@ def clear_cache():
         console.print("[yellow]Cache directory does not exist.[/yellow]")
         return
 
+    file_count = 0
     try:
-        # Count files before deletion
-        file_count = sum(1 for _ in cache_dir.rglob("*.db"))
-
-        # Clear all .db files but preserve directory structure
+        # Clear all .db files but preserve directory structure (single pass)
         for db_file in cache_dir.rglob("*.db"):
-            db_file.unlink()
+            os.unlink(db_file)
+            file_count += 1
 
         console.print(f"[green]✓ Cleared {file_count} cached predictions from {cache_dir}[/green]")
         console.print("[dim]Directory structure preserved (DSPy requires 000-015 subdirectories)[/dim]")
     except Exception as e:
-        console.print(f"[red]Error clearing cache: {e}[/red]")
+        console.print(f"[red]Error clearing cache after removing {file_count} files: {e}[/red]")
 
 
 @app.command()
@@ -381,6 +420,9 @@ def validate(
 ):
     """Validate configuration and data."""
 
+    # Needed to report API key status
+    _load_env_once()
+
     cfg = load_config(str(config))
 
     console.print("[bold blue]Validating Configuration[/bold blue]")
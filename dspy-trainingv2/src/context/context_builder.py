@@ -11,6 +11,10 @@ For DSPy optimization, we want to optimize layer 2 while holding others constant
 """
 
 import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 from pathlib import Path
 from typing import Optional
@@ -20,6 +24,48 @@ from .prompt_templates import PromptTemplateLoader, get_default_template
 
 logger = logging.getLogger(__name__)
 
+# Static scaffolding of the environment block; only the fields vary per example
+_ENV_TEMPLATE = (
+    "Here is useful information about the environment you are running in:\n"
+    "<env>\n"
+    "Working directory: {working_directory}\n"
+    "Is directory a git repo: {is_git_repo}\n"
+    # Platform (simplified, as we don't track this in session logs)
+    "Platform: linux\n"
+    "Today's date: {today}\n"
+    "</env>"
+    "{files_block}"
+)
+
+# Maximum number of relevant files listed in the environment block
+_MAX_ENV_FILES = 50
+
+# Start of the first line that begins the instructions / the environment block
+_SECTION_START_RE = re.compile(r'^.*?(?:You are|# )', re.MULTILINE)
+_SECTION_END_RE = re.compile(r'^.*?(?:<env>|Here is useful information)', re.MULTILINE)
+
+# Model ID substring -> provider, checked in order (first match wins)
+_PROVIDER_KEYWORDS = (
+    ("claude", "anthropic"),
+    ("gpt", "openai"),
+    ("openai", "openai"),
+    ("gemini", "google"),
+    ("ollama", "ollama"),
+)
+
+# Below this many examples, process start-up outweighs parallel prompt building
+_PARALLEL_PROMPT_THRESHOLD = 256
+
+_GIT_STATUS_TEMPLATE = (
+    "gitStatus: This is the git status at the start of the conversation.\n"
+    "Current branch: {branch}\n"
+    "\n"
+    "Main branch (you will usually use this for PRs): \n"
+)
+
+# How long the cached "today" string is reused before date.today() is re-read
+_TODAY_REFRESH_SECONDS = 3600
+
 
 class ContextBuilder:
     """Build OpenCode-compatible system prompts."""
@@ -31,21 +77,82 @@ class ContextBuilder:
         Args:
             opencode_path: Optional path to OpenCode source for loading templates
         """
+        self.opencode_path = opencode_path
+
         if opencode_path:
             self.template_loader = PromptTemplateLoader(opencode_path)
         else:
             self.template_loader = None
             logger.info("No OpenCode path provided, will use default templates")
 
+        # Resolved prompts, reused across examples (including fallbacks and
+        # misses, which the template loader itself does not cache)
+        self._template_cache: dict[str, str] = {}
+        self._agent_prompt_cache: dict[str, str] = {}
+        self._model_prompt_cache: dict[tuple[str, str], str] = {}
+
+        self._today_iso = date.today().isoformat()
+        self._today_checked = time.monotonic()
+
+    def _today(self) -> str:
+        """Today's date as ISO string, re-read at most once per refresh interval."""
+        now = time.monotonic()
+        if now - self._today_checked > _TODAY_REFRESH_SECONDS:
+            self._today_iso = date.today().isoformat()
+            self._today_checked = now
+        return self._today_iso
+
+    def clear_template_cache(self):
+        """Forget cached templates so they are re-resolved on next use."""
+        self._template_cache.clear()
+        self._agent_prompt_cache.clear()
+        self._model_prompt_cache.clear()
+
     def load_template(self, template_name: str) -> str:
         """Load a template, falling back to defaults if needed."""
+        cached = self._template_cache.get(template_name)
+        if cached is not None:
+            return cached
+
+        content = ""
         if self.template_loader:
             content = self.template_loader.load_template(template_name)
-            if content:
-                return content
 
-        # Fall back to default
-        return get_default_template(template_name)
+        if not content:
+            # Fall back to default
+            content = get_default_template(template_name)
+
+        self._template_cache[template_name] = content
+        return content
+
+    def _get_agent_prompt(self, agent_name: str) -> str:
+        """Agent-specific prompt (cached per agent name)."""
+        cached = self._agent_prompt_cache.get(agent_name)
+        if cached is not None:
+            return cached
+
+        if self.template_loader:
+            agent_prompt = self.template_loader.get_agent_prompt(agent_name)
+        else:
+            agent_prompt = get_default_template(agent_name)
+
+        self._agent_prompt_cache[agent_name] = agent_prompt
+        return agent_prompt
+
+    def _get_model_prompt(self, model_id: str, provider_id: str) -> str:
+        """Model default prompt (cached per model/provider pair)."""
+        key = (model_id, provider_id)
+        cached = self._model_prompt_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self.template_loader:
+            model_prompt = self.template_loader.get_model_prompt(model_id, provider_id)
+        else:
+            model_prompt = get_default_template("qwen")
+
+        self._model_prompt_cache[key] = model_prompt
+        return model_prompt
 
     def build_environment_block(self, context: ContextInfo) -> str:
         """
@@ -57,46 +164,26 @@ class ContextBuilder:
         Returns:
             Formatted environment block
         """
-        env_parts = []
-
-        env_parts.append("Here is useful information about the environment you are running in:")
-        env_parts.append("<env>")
-        env_parts.append(f"Working directory: {context.working_directory}")
-
         # Git info
-        if context.git_status:
-            git = context.git_status
-            is_git_repo = bool(git.get('branch'))
-            env_parts.append(f"Is directory a git repo: {is_git_repo}")
-        else:
-            env_parts.append("Is directory a git repo: False")
-
-        # Platform (simplified, as we don't track this in session logs)
-        env_parts.append("Platform: linux")
-
-        # Date
-        env_parts.append(f"Today's date: {date.today().isoformat()}")
-
-        env_parts.append("</env>")
+        git = context.git_status
+        is_git_repo = bool(git.get('branch')) if git else False
 
         # File tree section (truncated)
-        if context.relevant_files:
-            env_parts.append("")
-            env_parts.append("Relevant files in the workspace:")
-            env_parts.append("<files>")
-
-            # Show up to 50 files
-            files_to_show = context.relevant_files[:50]
-            for file_path in files_to_show:
-                env_parts.append(f"  {file_path}")
-
-            if len(context.relevant_files) > 50:
-                remaining = len(context.relevant_files) - 50
-                env_parts.append(f"  ... and {remaining} more files")
-
-            env_parts.append("</files>")
-
-        return "\n".join(env_parts)
+        files_block = ""
+        relevant_files = context.relevant_files
+        if relevant_files:
+            listing = "  " + "\n  ".join(relevant_files[:_MAX_ENV_FILES])
+            if len(relevant_files) > _MAX_ENV_FILES:
+                remaining = len(relevant_files) - _MAX_ENV_FILES
+                listing += f"\n  ... and {remaining} more files"
+            files_block = f"\n\nRelevant files in the workspace:\n<files>\n{listing}\n</files>"
+
+        return _ENV_TEMPLATE.format(
+            working_directory=context.working_directory,
+            is_git_repo=is_git_repo,
+            today=self._today(),
+            files_block=files_block
+        )
 
     def build_git_status_block(self, context: ContextInfo) -> str:
         """
@@ -112,20 +199,14 @@ class ContextBuilder:
             return ""
 
         git = context.git_status
-        parts = []
-
-        parts.append("gitStatus: This is the git status at the start of the conversation.")
-        parts.append(f"Current branch: {git.get('branch', 'unknown')}")
-        parts.append("")
-        parts.append("Main branch (you will usually use this for PRs): ")
-        parts.append("")
+        block = _GIT_STATUS_TEMPLATE.format(branch=git.get('branch', 'unknown'))
 
         # Include git status output if available
-        if git.get('status'):
-            parts.append("Status:")
-            parts.append(git['status'])
+        status = git.get('status')
+        if status:
+            block = f"{block}\nStatus:\n{status}"
 
-        return "\n".join(parts)
+        return block
 
     def build_system_prompt(
         self,
@@ -164,27 +245,16 @@ class ContextBuilder:
             parts.append(agent_prompt_override)
         elif agent_name:
             # Use agent-specific prompt
-            if self.template_loader:
-                agent_prompt = self.template_loader.get_agent_prompt(agent_name)
-            else:
-                agent_prompt = get_default_template(agent_name)
+            agent_prompt = self._get_agent_prompt(agent_name)
 
             if agent_prompt:
                 parts.append(agent_prompt)
             else:
                 # Fall back to model default
-                if self.template_loader:
-                    model_prompt = self.template_loader.get_model_prompt(model_id, provider_id)
-                else:
-                    model_prompt = get_default_template("qwen")
-                parts.append(model_prompt)
+                parts.append(self._get_model_prompt(model_id, provider_id))
         else:
             # Use model default prompt
-            if self.template_loader:
-                model_prompt = self.template_loader.get_model_prompt(model_id, provider_id)
-            else:
-                model_prompt = get_default_template("qwen")
-            parts.append(model_prompt)
+            parts.append(self._get_model_prompt(model_id, provider_id))
 
         # Layer 3: Environment (dynamic)
         env_block = self.build_environment_block(context)
@@ -225,18 +295,55 @@ class ContextBuilder:
             agent_prompt_override=optimized_prompt
         )
 
+    def build_prompts_batch(
+        self,
+        session_examples: list,
+        optimized_prompt: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ) -> list[str]:
+        """
+        Build complete system prompts for many session examples.
+
+        Large batches are built in a process pool (prompt assembly is CPU-bound
+        string work); batches under _PARALLEL_PROMPT_THRESHOLD, or with
+        max_workers=1, are built serially in this process.
+
+        Args:
+            session_examples: SessionExample objects
+            optimized_prompt: Optional optimized prompt to test
+            max_workers: Worker processes (defaults to os.cpu_count())
+
+        Returns:
+            Prompts in the same order as session_examples
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        if max_workers <= 1 or len(session_examples) < _PARALLEL_PROMPT_THRESHOLD:
+            return [
+                self.build_prompt_for_example(ex, optimized_prompt=optimized_prompt)
+                for ex in session_examples
+            ]
+
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_prompt_worker,
+            initargs=(self.opencode_path,)
+        ) as executor:
+            return list(executor.map(
+                _build_prompt_worker,
+                session_examples,
+                [optimized_prompt] * len(session_examples),
+                chunksize=64
+            ))
+
     def _extract_provider(self, model_id: str) -> str:
         """Extract provider from model ID."""
-        if "claude" in model_id.lower():
-            return "anthropic"
-        elif "gpt" in model_id.lower() or "openai" in model_id.lower():
-            return "openai"
-        elif "gemini" in model_id.lower():
-            return "google"
-        elif "ollama" in model_id.lower():
-            return "ollama"
-        else:
-            return "unknown"
+        model_lower = model_id.lower()
+        for keyword, provider in _PROVIDER_KEYWORDS:
+            if keyword in model_lower:
+                return provider
+        return "unknown"
 
     def extract_optimizable_section(self, full_prompt: str) -> str:
         """
@@ -253,22 +360,29 @@ class ContextBuilder:
         # This is a heuristic - look for the section between header and environment
         # In practice, the optimized prompt is what DSPy will modify
 
-        lines = full_prompt.split('\n')
-
-        # Skip header (if present)
-        start_idx = 0
-        for i, line in enumerate(lines):
-            # Skip until we're past any header material
-            if "You are" in line or "# " in line:
-                start_idx = i
-                break
+        # Skip header (if present): start at the first line past any header material
+        match = _SECTION_START_RE.search(full_prompt)
+        start = match.start() if match else 0
 
-        # Find where environment starts
-        end_idx = len(lines)
-        for i, line in enumerate(lines[start_idx:], start=start_idx):
-            if "<env>" in line or "Here is useful information" in line:
-                end_idx = i
-                break
+        # Find the line where the environment starts
+        match = _SECTION_END_RE.search(full_prompt, start)
+        end = match.start() if match else len(full_prompt)
 
         # Extract the middle section
-        return '\n'.join(lines[start_idx:end_idx]).strip()
+        return full_prompt[start:end].strip()
+
+
+_worker_context_builder: Optional[ContextBuilder] = None
+
+
+def _init_prompt_worker(opencode_path: Optional[str]):
+    """Process-pool initializer: one ContextBuilder (and template cache) per worker."""
+    global _worker_context_builder
+    _worker_context_builder = ContextBuilder(opencode_path)
+
+
+def _build_prompt_worker(session_example, optimized_prompt: Optional[str]) -> str:
+    """Process-pool entry point for ContextBuilder.build_prompts_batch."""
+    return _worker_context_builder.build_prompt_for_example(
+        session_example, optimized_prompt=optimized_prompt
+    )
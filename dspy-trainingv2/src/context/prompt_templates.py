@@ -5,11 +5,29 @@ These templates serve as the starting point for DSPy optimization.
 They are extracted from the OpenCode source code.
 """
 
+import os
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Model ID substrings -> template name, checked in order (first match wins).
+# Based on OpenCode's model selection logic.
+_MODEL_TEMPLATE_RULES = (
+    (("claude",), "anthropic"),                    # Anthropic models
+    (("qwen",), "qwen"),                           # Qwen models (common for local/Ollama)
+    (("gemini",), "gemini"),                       # Gemini models
+    (("gpt-4", "gpt-o", "o1", "o3"), "beast"),     # OpenAI GPT-4/o series
+    (("gpt-5", "codex"), "codex"),                 # GPT-5/codex
+    (("polaris",), "polaris"),                     # Polaris
+)
+
+# Agent name -> template name
+_AGENT_TEMPLATES = {
+    "plan": "plan",
+    "build": "build-switch",  # Build agent might use build-switch template
+}
+
 
 class PromptTemplateLoader:
     """Load prompt templates from OpenCode source."""
@@ -23,7 +41,30 @@ class PromptTemplateLoader:
         """
         self.opencode_path = Path(opencode_path)
         self.prompt_dir = self.opencode_path / "packages/opencode/src/session/prompt"
-        self._templates = {}
+        self._model_template_names: dict[tuple[str, str], str] = {}
+
+        # Index the prompt directory once; each entry is the file's Path until
+        # the template is first requested, then its content
+        self._templates: dict[str, Path | str] = self._scan_prompt_dir()
+
+    def _scan_prompt_dir(self) -> dict[str, Path]:
+        """
+        Find all *.txt templates in the prompt directory (without reading them).
+
+        Returns:
+            Dictionary mapping template names to file paths
+        """
+        # scandir + suffix check: no fnmatch pattern and no extra stat per entry
+        try:
+            with os.scandir(self.prompt_dir) as entries:
+                return {
+                    entry.name[:-4]: Path(entry.path)
+                    for entry in entries
+                    if entry.name.endswith(".txt") and not entry.name.startswith(".")
+                    and entry.is_file()
+                }
+        except OSError:
+            return {}
 
     def load_template(self, template_name: str) -> str:
         """
@@ -35,30 +76,28 @@ class PromptTemplateLoader:
         Returns:
             Template content as string
         """
-        # Check cache first
-        if template_name in self._templates:
-            return self._templates[template_name]
-
-        # Load from file
-        template_file = self.prompt_dir / f"{template_name}.txt"
-
-        if not template_file.exists():
-            logger.warning(f"Template file not found: {template_file}")
+        entry = self._templates.get(template_name)
+        if entry is None:
+            logger.warning(f"Template file not found: {self.prompt_dir / f'{template_name}.txt'}")
             return ""
+        if isinstance(entry, str):
+            return entry
 
+        # First use: read the file and replace the Path sentinel
         try:
-            with open(template_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Cache it
-            self._templates[template_name] = content
-            logger.debug(f"Loaded template: {template_name}")
-            return content
-
+            content = entry.read_bytes().decode('utf-8')
         except Exception as e:
             logger.error(f"Failed to load template {template_name}: {e}")
             return ""
 
+        # Same result as text-mode universal newlines, without the TextIOWrapper
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+        self._templates[template_name] = content
+        logger.debug(f"Loaded template: {template_name}")
+        return content
+
     def load_all_templates(self) -> dict[str, str]:
         """
         Load all available prompt templates.
@@ -70,10 +109,7 @@ class PromptTemplateLoader:
             logger.error(f"Prompt directory not found: {self.prompt_dir}")
             return {}
 
-        templates = {}
-        for template_file in self.prompt_dir.glob("*.txt"):
-            template_name = template_file.stem
-            templates[template_name] = self.load_template(template_name)
+        templates = {name: self.load_template(name) for name in self._templates}
 
         logger.info(f"Loaded {len(templates)} prompt templates")
         return templates
@@ -89,36 +125,27 @@ class PromptTemplateLoader:
         Returns:
             Prompt template content
         """
-        # Map models to their default prompts
-        # Based on OpenCode's model selection logic
-
-        # Anthropic models
-        if "claude" in model_id.lower() or "anthropic" in provider_id.lower():
-            return self.load_template("anthropic")
-
-        # Qwen models (common for local/Ollama)
-        if "qwen" in model_id.lower():
-            return self.load_template("qwen")
+        key = (model_id, provider_id)
+        template_name = self._model_template_names.get(key)
+        if template_name is None:
+            template_name = self._resolve_model_template(model_id, provider_id)
+            self._model_template_names[key] = template_name
 
-        # Gemini models
-        if "gemini" in model_id.lower():
-            return self.load_template("gemini")
+        return self.load_template(template_name)
 
-        # OpenAI GPT-4/o series
-        if any(x in model_id.lower() for x in ["gpt-4", "gpt-o", "o1", "o3"]):
-            return self.load_template("beast")
-
-        # GPT-5/codex
-        if "gpt-5" in model_id.lower() or "codex" in model_id.lower():
-            return self.load_template("codex")
+    def _resolve_model_template(self, model_id: str, provider_id: str) -> str:
+        """Pick the template name for a model (see _MODEL_TEMPLATE_RULES)."""
+        if "anthropic" in provider_id.lower():
+            return "anthropic"
 
-        # Polaris
-        if "polaris" in model_id.lower():
-            return self.load_template("polaris")
+        model_lower = model_id.lower()
+        for keywords, template_name in _MODEL_TEMPLATE_RULES:
+            if any(keyword in model_lower for keyword in keywords):
+                return template_name
 
         # Default to qwen for unknown models (it's a good general-purpose prompt)
         logger.warning(f"Unknown model {model_id}, using qwen template as default")
-        return self.load_template("qwen")
+        return "qwen"
 
     def get_agent_prompt(self, agent_name: str) -> str:
         """
@@ -130,14 +157,11 @@ class PromptTemplateLoader:
         Returns:
             Agent prompt template content
         """
-        if agent_name == "plan":
-            return self.load_template("plan")
-        elif agent_name == "build":
-            # Build agent might use build-switch template
-            return self.load_template("build-switch")
-        else:
+        template_name = _AGENT_TEMPLATES.get(agent_name)
+        if template_name is None:
             logger.warning(f"Unknown agent {agent_name}")
             return ""
+        return self.load_template(template_name)
 
     def get_header_prompt(self, provider_id: str) -> str:
         """
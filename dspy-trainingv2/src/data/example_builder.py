@@ -8,7 +8,8 @@ suitable for training and evaluation.
 import json
 import logging
 import random
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
 
 try:
     import dspy
@@ -16,10 +17,47 @@ except ImportError:
     dspy = None
     logging.warning("DSPy not installed. Install with: pip install dspy-ai")
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 from .session_parser import SessionExample, ToolAction
 
 logger = logging.getLogger(__name__)
 
+# Fields the agent receives as inputs; everything else is a label or metadata
+INPUT_FIELDS = (
+    "task_description",
+    "environment_context",
+    "conversation_history",
+    "available_tools",
+)
+
+# Below this many examples, process start-up and pickling outweigh the gain
+PARALLEL_BUILD_THRESHOLD = 256
+
+# File suffixes save_examples writes as newline-delimited JSON
+_NDJSON_SUFFIXES = ('.jsonl', '.ndjson')
+
+# Static list based on OpenCode's tool set
+_AVAILABLE_TOOLS = "\n".join([
+    "read - Read file contents",
+    "write - Write/create a file",
+    "edit - Edit existing file with find/replace",
+    "bash - Execute bash commands",
+    "glob - Find files by pattern",
+    "grep - Search file contents",
+    "task - Launch sub-agent for complex tasks",
+    "todowrite - Manage task list",
+    "askuserquestion - Ask user for clarification"
+])
+
 
 class ExampleBuilder:
     """Build DSPy Example objects from SessionExample data."""
@@ -29,6 +67,14 @@ class ExampleBuilder:
         if dspy is None:
             raise ImportError("DSPy is required. Install with: pip install dspy-ai")
 
+        # One shared tuple per distinct tool sequence (sequences repeat a lot)
+        self._tool_sequences: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+    def _shared_tool_sequence(self, tools) -> tuple[str, ...]:
+        """Return the canonical tuple for a tool sequence, creating it on first use."""
+        tools = tuple(tools)
+        return self._tool_sequences.setdefault(tools, tools)
+
     def format_context(self, example: SessionExample) -> str:
         """
         Format context information as a string.
@@ -39,33 +85,34 @@ class ExampleBuilder:
         Returns:
             Formatted context string
         """
-        context_parts = []
-
-        # Working directory
-        context_parts.append(f"Working Directory: {example.context.working_directory}")
-
-        # File count
-        context_parts.append(f"Total Files: {example.context.file_count}")
+        context = example.context
+        context_parts = [
+            f"Working Directory: {context.working_directory}",
+            f"Total Files: {context.file_count}",
+        ]
 
         # Git status
-        if example.context.git_status:
-            git = example.context.git_status
-            context_parts.append(f"Git Branch: {git.get('branch', 'unknown')}")
-            context_parts.append(f"Uncommitted Changes: {git.get('uncommittedChanges', 0)}")
+        git = context.git_status
+        if git:
+            context_parts.append(
+                f"Git Branch: {git.get('branch', 'unknown')}\n"
+                f"Uncommitted Changes: {git.get('uncommittedChanges', 0)}"
+            )
 
         # LSP diagnostics
-        if example.context.lsp_diagnostics:
-            errors = example.context.lsp_diagnostics.get('errors', [])
-            warnings = example.context.lsp_diagnostics.get('warnings', [])
+        lsp = context.lsp_diagnostics
+        if lsp:
+            errors = lsp.get('errors', [])
+            warnings = lsp.get('warnings', [])
             context_parts.append(f"LSP Errors: {len(errors)}, Warnings: {len(warnings)}")
 
         # Relevant files (limited to avoid huge context)
-        if example.context.relevant_files:
-            num_files = len(example.context.relevant_files)
+        relevant_files = context.relevant_files
+        if relevant_files:
+            num_files = len(relevant_files)
             context_parts.append(f"Relevant Files ({num_files}):")
             # Show first 20 files
-            for file in example.context.relevant_files[:20]:
-                context_parts.append(f"  - {file}")
+            context_parts.append("  - " + "\n  - ".join(relevant_files[:20]))
             if num_files > 20:
                 context_parts.append(f"  ... and {num_files - 20} more files")
 
@@ -81,14 +128,26 @@ class ExampleBuilder:
         Returns:
             Formatted conversation string
         """
-        if not example.conversation_history:
+        history = example.conversation_history
+        if not history:
             return "No prior conversation"
 
-        history_parts = []
-        for msg in example.conversation_history:
-            history_parts.append(f"[{msg.role}]: {msg.content}")
+        return "\n".join([f"[{msg.role}]: {msg.content}" for msg in history])
+
+    def iter_tool_sequence(self, example: SessionExample) -> Iterator[str]:
+        """
+        Lazily yield the tools used, in order.
+
+        Use this instead of extract_tool_sequence when only a prefix or a
+        count is needed, so no list is built.
 
-        return "\n".join(history_parts)
+        Args:
+            example: SessionExample to extract tools from
+
+        Returns:
+            Iterator over tool names in order
+        """
+        return (action.tool for action in example.actions)
 
     def extract_tool_sequence(self, example: SessionExample) -> list[str]:
         """
@@ -130,103 +189,164 @@ class ExampleBuilder:
         Returns:
             Formatted tool list
         """
-        tools = [
-            "read - Read file contents",
-            "write - Write/create a file",
-            "edit - Edit existing file with find/replace",
-            "bash - Execute bash commands",
-            "glob - Find files by pattern",
-            "grep - Search file contents",
-            "task - Launch sub-agent for complex tasks",
-            "todowrite - Manage task list",
-            "askuserquestion - Ask user for clarification"
-        ]
-        return "\n".join(tools)
+        return _AVAILABLE_TOOLS
 
-    def build_dspy_example(
+    def build_example_dict(
         self,
         session_example: SessionExample,
         include_labels: bool = True
-    ) -> dspy.Example:
+    ) -> dict:
         """
-        Convert a SessionExample to a DSPy Example.
+        Build the plain field dict for a DSPy Example.
 
         Args:
             session_example: Parsed session example
             include_labels: Whether to include ground truth labels
 
         Returns:
-            DSPy Example object
+            Dictionary of example fields
         """
-        # Build input fields
-        example_dict = {
+        # Add labels if requested
+        if include_labels:
+            # Extract expected outputs from the session
+            outcome = session_example.outcome
+            labels = {
+                "expected_tools": self._shared_tool_sequence(self.iter_tool_sequence(session_example)),
+                "expected_first_action": self.extract_first_action(session_example),
+                "expected_response": session_example.final_response,
+                # Include quality metrics for filtering/weighting
+                "correctness": outcome.correctness,
+                "efficiency": outcome.efficiency,
+                "minimal_edits": outcome.minimal_edits,
+            }
+        else:
+            labels = {}
+
+        agent_config = session_example.agent_config
+        return {
+            # Input fields
             "task_description": session_example.task,
             "environment_context": self.format_context(session_example),
             "conversation_history": self.format_conversation_history(session_example),
             "available_tools": self.format_available_tools(),
+            **labels,
+            # Metadata
+            "session_id": session_example.session_id,
+            "agent_name": agent_config.name,
+            "model": agent_config.model,
         }
 
-        # Add labels if requested
-        if include_labels:
-            # Extract expected outputs from the session
-            tool_sequence = self.extract_tool_sequence(session_example)
-            first_action = self.extract_first_action(session_example)
+    def build_dspy_example(
+        self,
+        session_example: SessionExample,
+        include_labels: bool = True
+    ) -> dspy.Example:
+        """
+        Convert a SessionExample to a DSPy Example.
 
-            example_dict.update({
-                "expected_tools": tool_sequence,
-                "expected_first_action": first_action,
-                "expected_response": session_example.final_response,
-                # Include quality metrics for filtering/weighting
-                "correctness": session_example.outcome.correctness,
-                "efficiency": session_example.outcome.efficiency,
-                "minimal_edits": session_example.outcome.minimal_edits,
-            })
+        Args:
+            session_example: Parsed session example
+            include_labels: Whether to include ground truth labels
 
-        # Metadata
-        example_dict.update({
-            "session_id": session_example.session_id,
-            "agent_name": session_example.agent_config.name,
-            "model": session_example.agent_config.model,
-        })
+        Returns:
+            DSPy Example object
+        """
+        example_dict = self.build_example_dict(session_example, include_labels=include_labels)
 
         # Create DSPy Example
         # Note: DSPy Examples are immutable once created
-        return dspy.Example(**example_dict).with_inputs(
-            "task_description",
-            "environment_context",
-            "conversation_history",
-            "available_tools"
-        )
+        return dspy.Example(**example_dict).with_inputs(*INPUT_FIELDS)
 
     def build_batch(
         self,
         session_examples: list[SessionExample],
-        include_labels: bool = True
+        include_labels: bool = True,
+        max_workers: int = 1
     ) -> list[dspy.Example]:
         """
         Convert multiple SessionExamples to DSPy Examples.
 
+        With max_workers > 1 and at least PARALLEL_BUILD_THRESHOLD examples, the
+        string formatting runs in a process pool. Workers return plain dicts and
+        the DSPy Examples are created here, so nothing DSPy-specific is pickled.
+
         Args:
             session_examples: List of parsed session examples
             include_labels: Whether to include ground truth labels
+            max_workers: Worker processes to use (1 builds serially)
 
         Returns:
             List of DSPy Example objects
         """
         dspy_examples = []
 
-        for session_ex in session_examples:
+        if max_workers > 1 and len(session_examples) >= PARALLEL_BUILD_THRESHOLD:
+            chunksize = max(1, len(session_examples) // (4 * max_workers))
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = executor.map(
+                    _build_example_dict_worker,
+                    session_examples,
+                    [include_labels] * len(session_examples),
+                    chunksize=chunksize
+                )
+                for session_ex, (example_dict, error) in zip(session_examples, results):
+                    if error is not None:
+                        logger.error(f"Failed to build DSPy example for session {session_ex.session_id}: {error}")
+                        continue
+                    if include_labels:
+                        # Re-share sequences that were duplicated by pickling
+                        example_dict["expected_tools"] = self._shared_tool_sequence(
+                            example_dict["expected_tools"]
+                        )
+                    dspy_examples.append(dspy.Example(**example_dict).with_inputs(*INPUT_FIELDS))
+        else:
+            # Common case: every example builds, so guard the whole batch once
             try:
-                dspy_ex = self.build_dspy_example(session_ex, include_labels=include_labels)
-                dspy_examples.append(dspy_ex)
-            except Exception as e:
-                logger.error(f"Failed to build DSPy example for session {session_ex.session_id}: {e}")
-                continue
+                dspy_examples = [
+                    self.build_dspy_example(session_ex, include_labels=include_labels)
+                    for session_ex in session_examples
+                ]
+            except Exception:
+                # Rare case: rebuild one at a time to skip and log the bad ones
+                dspy_examples = []
+                for session_ex in session_examples:
+                    try:
+                        dspy_ex = self.build_dspy_example(session_ex, include_labels=include_labels)
+                        dspy_examples.append(dspy_ex)
+                    except Exception as e:
+                        logger.error(f"Failed to build DSPy example for session {session_ex.session_id}: {e}")
+                        continue
 
         logger.info(f"Built {len(dspy_examples)} DSPy examples from {len(session_examples)} sessions")
         return dspy_examples
 
 
+_worker_builder: Optional[ExampleBuilder] = None
+
+
+def _build_example_dict_worker(
+    session_example: SessionExample,
+    include_labels: bool
+) -> tuple[Optional[dict], Optional[str]]:
+    """
+    Process-pool entry point for ExampleBuilder.build_batch.
+
+    Args:
+        session_example: Parsed session example
+        include_labels: Whether to include ground truth labels
+
+    Returns:
+        Tuple of (example dict, None) on success or (None, error message)
+    """
+    global _worker_builder
+    try:
+        if _worker_builder is None:
+            _worker_builder = ExampleBuilder()
+        return _worker_builder.build_example_dict(session_example, include_labels=include_labels), None
+    except Exception as e:
+        return None, str(e)
+
+
 def split_examples(
     examples: list[dspy.Example],
     train_split: float = 0.7,
@@ -254,11 +374,44 @@ def split_examples(
     if abs(total_split - 1.0) > 0.01:
         raise ValueError(f"Splits must sum to 1.0, got {total_split}")
 
-    # Set random seed
-    random.seed(random_seed)
-
     # Stratify if requested
-    if stratify_by:
+    if stratify_by and np is not None:
+        # Number groups in first-seen order, then split each group's index
+        # slice with array ops instead of growing per-group lists
+        n = len(examples)
+        group_ids = {}
+        codes = np.fromiter(
+            (group_ids.setdefault(getattr(ex, stratify_by, "unknown"), len(group_ids))
+             for ex in examples),
+            dtype=np.intp,
+            count=n
+        )
+        order = np.argsort(codes, kind="stable")
+        bounds = np.cumsum(np.bincount(codes, minlength=len(group_ids)))
+        rng = np.random.default_rng(random_seed)
+
+        train_order, val_order, test_order = [], [], []
+        start = 0
+        for end in bounds.tolist():
+            indices = rng.permutation(order[start:end])
+            size = end - start
+            train_idx = int(size * train_split)
+            val_idx = int(size * (train_split + val_split))
+
+            train_order.append(indices[:train_idx])
+            val_order.append(indices[train_idx:val_idx])
+            test_order.append(indices[val_idx:])
+            start = end
+
+        train, val, test = (
+            [examples[i] for i in np.concatenate(parts).tolist()] if parts else []
+            for parts in (train_order, val_order, test_order)
+        )
+
+    elif stratify_by:
+        # Set random seed
+        random.seed(random_seed)
+
         # Group by stratify field
         groups = {}
         for ex in examples:
@@ -270,7 +423,8 @@ def split_examples(
         # Split each group proportionally
         train, val, test = [], [], []
         for group_examples in groups.values():
-            shuffled = random.sample(group_examples, len(group_examples))
+            shuffled = list(group_examples)
+            random.shuffle(shuffled)
             n = len(shuffled)
             train_idx = int(n * train_split)
             val_idx = int(n * (train_split + val_split))
@@ -280,9 +434,13 @@ def split_examples(
             test.extend(shuffled[val_idx:])
 
     else:
-        # Simple random split
-        shuffled = random.sample(examples, len(examples))
-        n = len(shuffled)
+        # Simple random split: permute indices rather than the example list
+        n = len(examples)
+        if np is not None:
+            order = np.random.default_rng(random_seed).permutation(n).tolist()
+        else:
+            order = random.Random(random_seed).sample(range(n), n)
+        shuffled = [examples[i] for i in order]
         train_idx = int(n * train_split)
         val_idx = int(n * (train_split + val_split))
 
@@ -299,22 +457,46 @@ def split_examples(
     return train, val, test
 
 
+def _example_to_dict(example) -> dict:
+    """Serializable dict for a DSPy example (DSPy Examples have a toDict() method)."""
+    return example.toDict() if hasattr(example, 'toDict') else dict(example)
+
+
 def save_examples(examples: list[dspy.Example], file_path: str):
     """
     Save DSPy examples to a JSON file.
 
+    Paths ending in .jsonl or .ndjson are written as newline-delimited JSON,
+    one example per line, streamed without building the full list in memory.
+    Other paths get an indented JSON array.
+
     Args:
         examples: List of DSPy examples
         file_path: Path to save to
     """
+    if str(file_path).endswith(_NDJSON_SUFFIXES):
+        with open(file_path, 'wb') as f:
+            for ex in examples:
+                if orjson is not None:
+                    f.write(orjson.dumps(
+                        _example_to_dict(ex),
+                        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+                    ))
+                else:
+                    f.write(json.dumps(_example_to_dict(ex)).encode('utf-8') + b"\n")
+
+        logger.info(f"Saved {len(examples)} examples to {file_path}")
+        return
+
     # Convert examples to serializable dicts
-    data = []
-    for ex in examples:
-        # DSPy Examples have a toDict() method
-        data.append(ex.toDict() if hasattr(ex, 'toDict') else dict(ex))
+    data = [_example_to_dict(ex) for ex in examples]
 
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2)
+    if orjson is not None:
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(file_path, 'w') as f:
+            json.dump(data, f, indent=2)
 
     logger.info(f"Saved {len(examples)} examples to {file_path}")
 
@@ -323,6 +505,9 @@ def load_examples(file_path: str) -> list[dspy.Example]:
     """
     Load DSPy examples from a JSON file.
 
+    Accepts both formats written by save_examples: a JSON array or
+    newline-delimited JSON (one example per line).
+
     Args:
         file_path: Path to load from
 
@@ -332,8 +517,15 @@ def load_examples(file_path: str) -> list[dspy.Example]:
     if dspy is None:
         raise ImportError("DSPy is required. Install with: pip install dspy-ai")
 
-    with open(file_path, 'r') as f:
-        data = json.load(f)
+    loads = orjson.loads if orjson is not None else json.loads
+
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+
+    if raw.lstrip()[:1] == b'[':
+        data = loads(raw)
+    else:
+        data = [loads(line) for line in raw.splitlines() if line.strip()]
 
     examples = [dspy.Example(**ex_dict) for ex_dict in data]
     logger.info(f"Loaded {len(examples)} examples from {file_path}")
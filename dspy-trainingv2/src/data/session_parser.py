@@ -5,16 +5,72 @@ This module loads JSON session logs from the OpenCode session logger plugin
 and converts them into structured SessionExample objects for DSPy training.
 """
 
+import hashlib
 import json
 import logging
+import mmap
+import os
+import pickle
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+# Session files at least this large are memory-mapped for orjson rather than
+# copied into a bytes object; below it the extra mmap syscalls cost more
+_MMAP_MIN_BYTES = 64 * 1024
+
+# Bump when the pickled SessionExample layout or the parse/filter rules
+# change in a way the source hash below would not catch
+_PARSED_CACHE_VERSION = 1
+
+try:
+    # Parsed-example cache entries are keyed on this module's source, so
+    # editing the parser or the dataclasses invalidates them
+    with open(__file__, 'rb') as _source:
+        _PARSER_SOURCE_HASH = hashlib.blake2b(_source.read(), digest_size=16).hexdigest()
+    del _source
+except OSError:
+    _PARSER_SOURCE_HASH = None
+
+
+def _read_session_json(file_path: Path):
+    """
+    Read and parse a session JSON file.
+
+    The whole file is parsed from one buffer (both parsers accept bytes, and
+    json detects the UTF encoding), so there is no text-mode stream adapter
+    issuing small reads. With orjson, large files are parsed straight from a
+    read-only memory map, skipping the copy into a bytes object.
+    """
+    with open(file_path, 'rb') as f:
+        if orjson is None:
+            return json.loads(f.read())
+
+        if os.fstat(f.fileno()).st_size < _MMAP_MIN_BYTES:
+            return orjson.loads(f.read())
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+
+def _intern(value):
+    """Intern a string field (tool names, roles, agents, models repeat a lot)."""
+    return sys.intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
 class ContextInfo:
     """Context information from the OpenCode session."""
     working_directory: str
@@ -24,7 +80,7 @@ class ContextInfo:
     file_count: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolAction:
     """A single tool call action from the session."""
     step: int
@@ -36,7 +92,7 @@ class ToolAction:
     success: Optional[bool] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """A conversation message."""
     role: str
@@ -44,7 +100,7 @@ class Message:
     timestamp: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Evaluation:
     """Evaluation metrics for the session outcome."""
     correctness: float
@@ -52,7 +108,7 @@ class Evaluation:
     minimal_edits: float
 
 
-@dataclass
+@dataclass(slots=True)
 class Outcome:
     """Outcome information for the session."""
     success: bool
@@ -66,7 +122,7 @@ class Outcome:
     files_modified: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentConfig:
     """Agent configuration from the session."""
     name: str
@@ -76,7 +132,7 @@ class AgentConfig:
     completion_tokens: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionExample:
     """A complete training example extracted from a session log."""
     session_id: str
@@ -93,21 +149,124 @@ class SessionExample:
 class SessionParser:
     """Parse OpenCode session logs into structured training examples."""
 
-    def __init__(self, min_correctness: float = 0.0, min_efficiency: float = 0.0):
+    def __init__(
+        self,
+        min_correctness: float = 0.0,
+        min_efficiency: float = 0.0,
+        cache_dir: Optional[Path] = None
+    ):
         """
         Initialize the session parser.
 
         Args:
             min_correctness: Minimum correctness score to include (0-1)
             min_efficiency: Minimum efficiency score to include (0-1)
+            cache_dir: Optional directory for caching loaded session files
+                between runs (disabled when None)
         """
         self.min_correctness = min_correctness
         self.min_efficiency = min_efficiency
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _cache_path(self, file_path: Path) -> Optional[Path]:
+        """
+        Get the cache entry for a session file, keyed on path, mtime and size.
+
+        Named "<path digest>-<mtime/size digest>.pkl", so _write_cache can
+        find and remove the entry left by an older version of the same file.
+        """
+        if self.cache_dir is None:
+            return None
+
+        stat = file_path.stat()
+        path_digest = hashlib.blake2b(str(file_path.resolve()).encode(), digest_size=16).hexdigest()
+        stat_digest = hashlib.blake2b(
+            f"{stat.st_mtime_ns}:{stat.st_size}".encode(), digest_size=16
+        ).hexdigest()
+        return self.cache_dir / f"{path_digest}-{stat_digest}.pkl"
+
+    def _parsed_cache_path(
+        self,
+        directory: Path,
+        require_success: bool,
+        agent_filter: Optional[str]
+    ) -> Optional[Path]:
+        """
+        Get the cache entry for a directory's parsed and filtered examples.
+
+        Keyed on every session file's name, mtime and size plus the filter
+        settings, so adding, removing or touching any file misses. The
+        cache format version and this module's source hash are part of the
+        key too, so a changed parser never reads back stale examples.
+
+        Entries are named "parsed-<digest>.pkl", so writing a new one prunes
+        every older parsed entry (see _write_cache): only the latest is kept.
+        """
+        if self.cache_dir is None or _PARSER_SOURCE_HASH is None:
+            return None
+
+        h = hashlib.blake2b(digest_size=16)
+        h.update(
+            f"{_PARSED_CACHE_VERSION}:{_PARSER_SOURCE_HASH}:"
+            f"{directory.resolve()}:{self.min_correctness}:{self.min_efficiency}:"
+            f"{require_success}:{agent_filter}".encode()
+        )
+        try:
+            with os.scandir(directory) as entries:
+                for name, stat in sorted(
+                    (entry.name, entry.stat()) for entry in entries if entry.name.endswith(".json")
+                ):
+                    h.update(f"\0{name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        except OSError as e:
+            logger.warning(f"Not caching parsed sessions for {directory}: {e}")
+            return None
+        return self.cache_dir / f"parsed-{h.hexdigest()}.pkl"
+
+    def _read_cache(self, cache_path: Path):
+        """Read a cache entry, returning None if missing or unreadable."""
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable session cache {cache_path}: {e}")
+            return None
+
+    def _write_cache(self, cache_path: Path, data):
+        """
+        Write a cache entry (atomically, via rename).
+
+        Entry names end in "-<digest>.pkl"; other entries sharing everything
+        before the last "-" are stale versions of this one and are deleted,
+        so the cache does not grow with every edit to a session file.
+        """
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to write session cache {cache_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        prefix = cache_path.name.rsplit("-", 1)[0]
+        for stale_path in cache_path.parent.glob(f"{prefix}-*.pkl"):
+            if stale_path != cache_path:
+                stale_path.unlink(missing_ok=True)
 
     def load_session_file(self, file_path: Path) -> Optional[dict]:
         """
         Load a single session JSON file.
 
+        When a cache directory is configured, sessions that were already
+        loaded and validated are read back from the cache instead of being
+        re-parsed, as long as the file's mtime and size are unchanged.
+
         Args:
             file_path: Path to the session JSON file
 
@@ -115,8 +274,13 @@ class SessionParser:
             Parsed session data or None if invalid
         """
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            cache_path = self._cache_path(file_path)
+            if cache_path is not None:
+                cached = self._read_cache(cache_path)
+                if cached is not None:
+                    return cached
+
+            data = _read_session_json(file_path)
 
             # Validate basic structure
             if not isinstance(data, dict):
@@ -127,6 +291,9 @@ class SessionParser:
                 logger.warning(f"Invalid session file {file_path}: missing 'examples' key")
                 return None
 
+            if cache_path is not None:
+                self._write_cache(cache_path, data)
+
             return data
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON from {file_path}: {e}")
@@ -135,25 +302,117 @@ class SessionParser:
             logger.error(f"Failed to load session file {file_path}: {e}")
             return None
 
-    def load_sessions_from_directory(self, directory: Path) -> list[dict]:
+    def iter_sessions_from_directory(
+        self,
+        directory: Path,
+        max_workers: Optional[int] = None,
+        use_processes: bool = False
+    ) -> Iterator[dict]:
         """
-        Load all session JSON files from a directory.
+        Lazily load session JSON files from a directory.
+
+        Files are read on a thread pool since each load is an independent
+        blocking read; sessions are yielded in the directory's file order.
+        Only about two files per worker are loaded ahead of the consumer, so
+        a caller that parses each session and drops the raw dict before the
+        next holds a bounded number of raw sessions at once. JSON decoding
+        holds the GIL, so for large directories of big files
+        use_processes=True decodes on several cores instead.
 
         Args:
             directory: Directory containing session JSON files
+            max_workers: Maximum number of loader threads or processes (None
+                uses the executor default, 1 loads serially)
+            use_processes: Load in a process pool rather than a thread pool
 
-        Returns:
-            List of parsed session data
+        Yields:
+            Parsed session data for each valid file
         """
-        sessions = []
-        json_files = list(directory.glob("*.json"))
+        # scandir + suffix check instead of glob: no fnmatch, and the dirent
+        # type answers is_file(), so only candidate .json files are stat'ed
+        # (for the empty-file check below)
+        json_files = []
+        empty_files = 0
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if not name.endswith(".json") or name.startswith(".") or not entry.is_file():
+                        continue
+                    # Empty files (e.g. a logger killed before its first flush)
+                    # can never parse; skip them without opening them
+                    if entry.stat().st_size == 0:
+                        empty_files += 1
+                        continue
+                    json_files.append(Path(entry.path))
+        except FileNotFoundError:
+            pass
 
         logger.info(f"Found {len(json_files)} JSON files in {directory}")
+        if empty_files:
+            logger.warning(f"Skipped {empty_files} empty JSON files in {directory}")
+
+        if max_workers == 1 or len(json_files) <= 1:
+            for session_data in map(self.load_session_file, json_files):
+                if session_data:
+                    yield session_data
+            return
+
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        if max_workers is None:
+            # The executors' own defaults, needed here to size the window below
+            cpus = os.cpu_count() or 1
+            max_workers = cpus if use_processes else min(32, cpus + 4)
+
+        # Batch files per inter-process round trip (threads gain nothing from it)
+        batch_size = 16 if use_processes else 1
+        batches = (json_files[i:i + batch_size] for i in range(0, len(json_files), batch_size))
+
+        with executor_cls(max_workers=max_workers) as executor:
+            # At most two batches per worker are in flight, and the next one
+            # is submitted only as a finished one is consumed. Workers stay
+            # busy, but loading never runs further ahead of the consumer.
+            pending = deque(
+                executor.submit(self._load_session_batch, batch)
+                for batch in islice(batches, 2 * max_workers)
+            )
+            try:
+                while pending:
+                    loaded = pending.popleft().result()
+                    next_batch = next(batches, None)
+                    if next_batch is not None:
+                        pending.append(executor.submit(self._load_session_batch, next_batch))
+                    for session_data in loaded:
+                        if session_data:
+                            yield session_data
+            finally:
+                # Consumer stopped early: drop whatever has not started yet
+                for future in pending:
+                    future.cancel()
+
+    def _load_session_batch(self, file_paths: list[Path]) -> list[Optional[dict]]:
+        """Load several session files in one executor task (see load_session_file)."""
+        return [self.load_session_file(file_path) for file_path in file_paths]
+
+    def load_sessions_from_directory(
+        self,
+        directory: Path,
+        max_workers: Optional[int] = None,
+        use_processes: bool = False
+    ) -> list[dict]:
+        """
+        Load all session JSON files from a directory.
+
+        Args:
+            directory: Directory containing session JSON files
+            max_workers: Maximum number of loader threads or processes (None
+                uses the executor default, 1 loads serially)
+            use_processes: Load in a process pool rather than a thread pool
 
-        for file_path in json_files:
-            session_data = self.load_session_file(file_path)
-            if session_data:
-                sessions.append(session_data)
+        Returns:
+            List of parsed session data
+        """
+        sessions = list(self.iter_sessions_from_directory(directory, max_workers, use_processes))
 
         logger.info(f"Successfully loaded {len(sessions)} session files")
         return sessions
@@ -161,7 +420,7 @@ class SessionParser:
     def parse_context(self, context_data: dict) -> ContextInfo:
         """Parse context information from session data."""
         return ContextInfo(
-            working_directory=context_data.get('workingDirectory', ''),
+            working_directory=_intern(context_data.get('workingDirectory', '')),
             relevant_files=context_data.get('relevantFiles', []),
             lsp_diagnostics=context_data.get('lspDiagnostics', {}),
             git_status=context_data.get('gitStatus'),
@@ -174,7 +433,7 @@ class SessionParser:
         for action_data in actions_data:
             action = ToolAction(
                 step=action_data.get('step', 0),
-                tool=action_data.get('tool', ''),
+                tool=_intern(action_data.get('tool', '')),
                 call_id=action_data.get('callID', ''),
                 args=action_data.get('args', {}),
                 timestamp=action_data.get('timestamp', ''),
@@ -189,7 +448,7 @@ class SessionParser:
         messages = []
         for msg_data in history_data:
             message = Message(
-                role=msg_data.get('role', ''),
+                role=_intern(msg_data.get('role', '')),
                 content=msg_data.get('content', ''),
                 timestamp=msg_data.get('timestamp', '')
             )
@@ -216,8 +475,8 @@ class SessionParser:
     def parse_agent_config(self, agent_data: dict) -> AgentConfig:
         """Parse agent configuration from session data."""
         return AgentConfig(
-            name=agent_data.get('name', ''),
-            model=agent_data.get('model', ''),
+            name=_intern(agent_data.get('name', '')),
+            model=_intern(agent_data.get('model', '')),
             temperature=agent_data.get('temperature', 0.0),
             prompt_tokens=agent_data.get('promptTokens', 0),
             completion_tokens=agent_data.get('completionTokens', 0)
@@ -278,10 +537,13 @@ class SessionParser:
         Returns:
             Filtered list of examples
         """
+        min_correctness = self.min_correctness
+        min_efficiency = self.min_efficiency
+
         filtered = []
         for example in examples:
-            if (example.outcome.correctness >= self.min_correctness and
-                example.outcome.efficiency >= self.min_efficiency):
+            outcome = example.outcome
+            if outcome.correctness >= min_correctness and outcome.efficiency >= min_efficiency:
                 filtered.append(example)
 
         logger.info(
@@ -302,28 +564,119 @@ class SessionParser:
         logger.info(f"Filtered to {len(filtered)}/{len(examples)} examples from agent '{agent_name}'")
         return filtered
 
-    def parse_sessions(self, session_data_list: list[dict]) -> list[SessionExample]:
+    def filter_combined(
+        self,
+        examples: list[SessionExample],
+        require_success: bool = False,
+        agent_filter: Optional[str] = None
+    ) -> list[SessionExample]:
+        """
+        Apply the success, quality and agent filters in a single pass.
+
+        Equivalent to filter_successful (if require_success), then
+        filter_by_quality, then filter_by_agent (if agent_filter), without
+        building the intermediate lists.
+
+        Args:
+            examples: List of session examples
+            require_success: Whether to keep only successful examples
+            agent_filter: Optional agent name to keep
+
+        Returns:
+            Filtered list of examples
+        """
+        min_correctness = self.min_correctness
+        min_efficiency = self.min_efficiency
+
+        filtered = []
+        for example in examples:
+            outcome = example.outcome
+            if require_success and not outcome.success:
+                continue
+            if outcome.correctness < min_correctness or outcome.efficiency < min_efficiency:
+                continue
+            if agent_filter and example.agent_config.name != agent_filter:
+                continue
+            filtered.append(example)
+
+        logger.info(
+            f"Filtered {len(examples)} examples to {len(filtered)} "
+            f"(success required={require_success}, correctness>={min_correctness}, "
+            f"efficiency>={min_efficiency}, agent={agent_filter or 'any'})"
+        )
+        return filtered
+
+    def passes_raw_filters(self, example_data: dict, require_success: bool = False) -> bool:
+        """
+        Check the quality (and optionally success) filters on raw example data.
+
+        Mirrors filter_successful/filter_by_quality, so rejected examples can
+        be dropped before their actions and history are parsed. Malformed
+        outcome data passes, leaving parse_example to report it.
+
+        Args:
+            example_data: Example data from session JSON
+            require_success: Whether the example must be successful
+
+        Returns:
+            False if the example would be filtered out, True otherwise
+        """
+        outcome_data = example_data.get('outcome', {})
+        if not isinstance(outcome_data, dict):
+            return True
+
+        if require_success and not outcome_data.get('success', False):
+            return False
+
+        evaluation = outcome_data.get('evaluation', {})
+        if not isinstance(evaluation, dict):
+            return True
+
+        try:
+            return (evaluation.get('correctness', 0.0) >= self.min_correctness and
+                    evaluation.get('efficiency', 0.0) >= self.min_efficiency)
+        except TypeError:
+            return True
+
+    def parse_sessions(
+        self,
+        session_data_list: Iterable[dict],
+        prefilter: bool = False,
+        require_success: bool = False
+    ) -> list[SessionExample]:
         """
         Parse multiple sessions into training examples.
 
         Args:
-            session_data_list: List of session data dicts
+            session_data_list: Session data dicts (a list or a lazy iterator,
+                e.g. from iter_sessions_from_directory)
+            prefilter: Skip examples failing the quality thresholds (see
+                passes_raw_filters) without parsing them
+            require_success: With prefilter, also skip unsuccessful examples
 
         Returns:
             List of SessionExample objects
         """
         all_examples = []
+        session_count = 0
+        skipped = 0
 
         for session_data in session_data_list:
+            session_count += 1
             session_id = session_data.get('session', 'unknown')
             examples_data = session_data.get('examples', [])
 
             for example_data in examples_data:
+                if prefilter and not self.passes_raw_filters(example_data, require_success):
+                    skipped += 1
+                    continue
                 example = self.parse_example(example_data, session_id)
                 if example:
                     all_examples.append(example)
 
-        logger.info(f"Parsed {len(all_examples)} total examples from {len(session_data_list)} sessions")
+        if skipped:
+            logger.info(f"Skipped {skipped} examples below quality thresholds before parsing")
+        logger.info(f"Parsed {len(all_examples)} total examples from {session_count} sessions")
         return all_examples
 
 
@@ -332,7 +685,10 @@ def load_and_parse_sessions(
     min_correctness: float = 0.8,
     min_efficiency: float = 0.0,
     require_success: bool = True,
-    agent_filter: Optional[str] = None
+    agent_filter: Optional[str] = None,
+    cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    use_processes: bool = False
 ) -> list[SessionExample]:
     """
     Convenience function to load and parse sessions with filtering.
@@ -343,25 +699,47 @@ def load_and_parse_sessions(
         min_efficiency: Minimum efficiency score (0-1)
         require_success: Whether to filter to only successful sessions
         agent_filter: Optional agent name to filter by
+        cache_dir: Optional directory for caching loaded session files and
+            the final filtered examples (reused while no session file changes)
+        max_workers: Maximum number of loader threads or processes
+        use_processes: Load files in a process pool rather than a thread pool
 
     Returns:
         List of filtered SessionExample objects
     """
-    parser = SessionParser(min_correctness=min_correctness, min_efficiency=min_efficiency)
-
-    # Load sessions
-    session_data = parser.load_sessions_from_directory(directory)
-
-    # Parse examples
-    examples = parser.parse_sessions(session_data)
+    parser = SessionParser(
+        min_correctness=min_correctness,
+        min_efficiency=min_efficiency,
+        cache_dir=cache_dir
+    )
+
+    directory = Path(directory)
+    parsed_cache_path = parser._parsed_cache_path(directory, require_success, agent_filter)
+    if parsed_cache_path is not None:
+        cached = parser._read_cache(parsed_cache_path)
+        if cached is not None:
+            logger.info(f"Loaded {len(cached)} parsed examples from cache {parsed_cache_path}")
+            return cached
+
+    # Load and parse sessions one file at a time so raw session dicts
+    # are released as soon as their examples have been extracted; the
+    # quality/success gates run on the raw dicts first, so rejected
+    # examples never have their actions and history parsed
+    examples = parser.parse_sessions(
+        parser.iter_sessions_from_directory(directory, max_workers, use_processes),
+        prefilter=True,
+        require_success=require_success
+    )
 
     # Apply filters
-    if require_success:
-        examples = parser.filter_successful(examples)
-
-    examples = parser.filter_by_quality(examples)
-
-    if agent_filter:
-        examples = parser.filter_by_agent(examples, agent_filter)
+    examples = parser.filter_combined(
+        examples,
+        require_success=require_success,
+        agent_filter=agent_filter
+    )
+
+    if parsed_cache_path is not None:
+        # Also deletes parsed entries from earlier runs
+        parser._write_cache(parsed_cache_path, examples)
 
     return examples
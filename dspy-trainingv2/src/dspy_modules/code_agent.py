@@ -6,7 +6,8 @@ This module will be optimized by DSPy to improve performance on smaller models.
 
 import json
 import logging
-from typing import Optional
+import re
+from typing import Any, Optional
 
 try:
     import dspy
@@ -17,8 +18,28 @@ except ImportError:
     CodeAgentResponse = None
     SimplifiedCodeAgent = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Body of the first <action>...</action> block (one scan instead of four)
+_ACTION_RE = re.compile(r"<action>(.*?)</action>", re.DOTALL)
+
+
+def _loads_action(json_str: str) -> Any:
+    """
+    Parse an action JSON string, with orjson when available.
+
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers
+    catch the same exception either way.
+    """
+    if orjson is not None:
+        return orjson.loads(json_str)
+    return json.loads(json_str)
+
 
 if dspy is not None:
     class OpenCodeAgent(dspy.Module):
@@ -91,6 +112,70 @@ if dspy is not None:
 
             return plan
 
+        async def aforward(
+            self,
+            task_description: str,
+            environment_context: str,
+            conversation_history: str = "",
+            available_tools: str = "",
+            tool_results: Optional[str] = None
+        ):
+            """
+            Async forward pass, so concurrent calls overlap LM round-trips.
+
+            Use via ``await agent.acall(...)``, e.g. with ``asyncio.gather``
+            over a batch of examples.
+
+            Args:
+                task_description: The user's task
+                environment_context: Environment information
+                conversation_history: Prior conversation
+                available_tools: Available tools
+                tool_results: Optional results from tool execution
+
+            Returns:
+                dspy.Prediction with reasoning, tool_plan, first_action, and optionally response
+            """
+            plan = await _acall(
+                self.planner,
+                task_description=task_description,
+                environment_context=environment_context,
+                conversation_history=conversation_history,
+                available_tools=available_tools
+            )
+
+            if tool_results:
+                response = await _acall(
+                    self.responder,
+                    task_description=task_description,
+                    tool_results=tool_results
+                )
+                return dspy.Prediction(
+                    reasoning=plan.reasoning,
+                    tool_plan=plan.tool_plan,
+                    first_action=plan.first_action,
+                    response=response.response
+                )
+
+            return plan
+
+
+    async def _acall(predictor, **kwargs):
+        """
+        Await a predictor, using its native async path when available.
+
+        Args:
+            predictor: DSPy predictor module
+            **kwargs: Predictor inputs
+
+        Returns:
+            dspy.Prediction
+        """
+        if hasattr(predictor, "acall"):
+            return await predictor.acall(**kwargs)
+        # Older DSPy versions: run the sync call in a worker thread
+        return await dspy.asyncify(predictor)(**kwargs)
+
 
     class SimplifiedAgent(dspy.Module):
         """
@@ -126,20 +211,18 @@ if dspy is not None:
             Returns:
                 Parsed action dict or None
             """
-            try:
-                action_plan = prediction.action_plan
-
-                # Extract JSON from <action>...</action> tags
-                if "<action>" in action_plan and "</action>" in action_plan:
-                    start = action_plan.find("<action>") + 8
-                    end = action_plan.find("</action>")
-                    json_str = action_plan[start:end].strip()
-                    return json.loads(json_str)
+            action_plan = getattr(prediction, "action_plan", None)
+            if action_plan is None:
+                logger.warning("Failed to extract action from prediction: no action_plan")
+                return None
 
-                # Try parsing the whole thing as JSON
-                return json.loads(action_plan)
+            # Extract JSON from <action>...</action> tags, else try the whole plan
+            match = _ACTION_RE.search(action_plan)
+            json_str = match.group(1).strip() if match else action_plan
 
-            except (json.JSONDecodeError, AttributeError, KeyError) as e:
+            try:
+                return _loads_action(json_str)
+            except json.JSONDecodeError as e:
                 logger.warning(f"Failed to extract action from prediction: {e}")
                 return None
 
@@ -200,7 +283,7 @@ if dspy is not None:
             )
 
             try:
-                return json.loads(prediction.first_action)
+                return _loads_action(prediction.first_action)
             except (json.JSONDecodeError, AttributeError):
                 return None
 
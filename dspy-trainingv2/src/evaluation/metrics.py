@@ -7,6 +7,7 @@ These metrics align with the session log evaluations and guide DSPy optimization
 import json
 import logging
 import re
+from functools import lru_cache
 from typing import Optional, Any
 
 try:
@@ -14,16 +15,57 @@ try:
 except ImportError:
     dspy = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger(__name__)
 
 
-# Valid OpenCode tools
-VALID_TOOLS = {
+# Valid OpenCode tools (all lowercase)
+VALID_TOOLS = frozenset({
     "read", "write", "edit", "bash", "glob", "grep",
     "task", "todowrite", "askuserquestion", "notebookedit",
     "webfetch", "websearch", "bashoutput", "killshell",
     "skill", "slashcommand", "enterplanmode", "exitplanmode"
+})
+
+# Fixed scan order for extract_tools_from_plan (set iteration order varies
+# between runs with string hash randomization)
+_PLAN_TOOLS = tuple(sorted(VALID_TOOLS))
+
+# Composite metric weights (same keys as optimization.metric_weights in config)
+COMPOSITE_WEIGHTS = {
+    "tool_validity": 3.0,       # High weight - must be valid
+    "reasoning_quality": 1.0,
+    "plan_coherence": 2.0,      # Important
+    "first_action_match": 2.0,  # Important
+    "efficiency": 1.0,
 }
+_WEIGHT_VALUES = tuple(COMPOSITE_WEIGHTS.values())
+_TOTAL_WEIGHT = sum(_WEIGHT_VALUES)
+# Unpacked for the unrolled weighted sum in composite_metric
+_W_TOOL, _W_REASONING, _W_PLAN, _W_ACTION, _W_EFFICIENCY = _WEIGHT_VALUES
+_WEIGHT_ARRAY = np.array(_WEIGHT_VALUES) / _TOTAL_WEIGHT if np is not None else None
+
+# Precompiled patterns for extract_relevant_terms
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+_FILEISH_RE = re.compile(r'\S*[/.]\S*')  # whole whitespace-delimited tokens containing / or .
+
+# Patterns and first characters for parse_action_json
+_JSON_FENCE_RE = re.compile(r'```json(.*?)```', re.DOTALL)
+_ACTION_TAG_RE = re.compile(r'<action>(.*?)</action>', re.DOTALL)
+_JSON_START_CHARS = frozenset('{["-0123456789tfnNI')  # NaN/Infinity are accepted by json.loads
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so either parser
+# can be caught the same way
+_json_loads = orjson.loads if orjson is not None else json.loads
 
 
 def extract_relevant_terms(environment_context: str) -> list[str]:
@@ -42,19 +84,27 @@ def extract_relevant_terms(environment_context: str) -> list[str]:
     for line in environment_context.split('\n'):
         # Look for file paths (containing / or .)
         if '/' in line or '.py' in line or '.js' in line or '.ts' in line:
-            # Extract the file name
-            parts = line.strip().split()
-            for part in parts:
-                if '/' in part or '.' in part:
-                    terms.add(part.strip('.,;:()[]{}'))
+            # Extract the file names (whitespace-delimited tokens with / or .)
+            terms.update([part.strip('.,;:()[]{}') for part in _FILEISH_RE.findall(line)])
 
     # Extract words in quotes (likely important entities)
-    quoted = re.findall(r'"([^"]+)"', environment_context)
-    terms.update(quoted)
+    terms.update(_QUOTED_RE.findall(environment_context))
 
     return list(terms)
 
 
+@lru_cache(maxsize=4096)
+def _lowered_terms_cached(environment_context: str) -> tuple[str, ...]:
+    """
+    Lowercased extract_relevant_terms, memoized per context string.
+
+    Examples are re-scored many times, so both the extraction and the
+    lowercasing are done once per context. Terms differing only in case
+    stay separate entries, as in the uncached count.
+    """
+    return tuple([term.lower() for term in extract_relevant_terms(environment_context)])
+
+
 def extract_tools_from_plan(tool_plan: str) -> list[str]:
     """
     Extract tool names from a tool plan string.
@@ -65,14 +115,8 @@ def extract_tools_from_plan(tool_plan: str) -> list[str]:
     Returns:
         List of tool names mentioned
     """
-    tools = []
     plan_lower = tool_plan.lower()
-
-    for tool in VALID_TOOLS:
-        if tool in plan_lower:
-            tools.append(tool)
-
-    return tools
+    return [tool for tool in _PLAN_TOOLS if tool in plan_lower]
 
 
 def parse_action_json(action_str: str) -> Optional[dict]:
@@ -85,30 +129,30 @@ def parse_action_json(action_str: str) -> Optional[dict]:
     Returns:
         Parsed dict or None
     """
-    try:
-        # Try direct JSON parse
-        return json.loads(action_str)
-    except json.JSONDecodeError:
-        # Try extracting JSON from markdown code block
-        if "```json" in action_str:
-            start = action_str.find("```json") + 7
-            end = action_str.find("```", start)
-            if end > start:
-                try:
-                    return json.loads(action_str[start:end].strip())
-                except json.JSONDecodeError:
-                    pass
-
-        # Try extracting from <action> tags
-        if "<action>" in action_str and "</action>" in action_str:
-            start = action_str.find("<action>") + 8
-            end = action_str.find("</action>")
+    # Try direct JSON parse, unless the text cannot possibly be JSON (most
+    # formatted actions start with prose, a code fence or a tag)
+    if action_str.lstrip(' \t\n\r')[:1] in _JSON_START_CHARS:
+        try:
+            return _json_loads(action_str)
+        except json.JSONDecodeError:
+            pass
+
+    # Try extracting JSON from a markdown code block, then from <action> tags
+    for pattern in (_JSON_FENCE_RE, _ACTION_TAG_RE):
+        match = pattern.search(action_str)
+        if match:
             try:
-                return json.loads(action_str[start:end].strip())
+                return _json_loads(match.group(1).strip())
             except json.JSONDecodeError:
                 pass
 
-        return None
+    return None
+
+
+# Memoized parse shared by the metric functions: composite_metric parses the
+# same first_action twice per call, and optimizers re-score identical
+# predictions across trials. The returned dict is shared - treat as read-only.
+_parse_action_cached = lru_cache(maxsize=4096)(parse_action_json)
 
 
 def tool_validity_score(prediction: Any) -> float:
@@ -126,18 +170,35 @@ def tool_validity_score(prediction: Any) -> float:
         if not first_action:
             return 0.0
 
-        action = parse_action_json(first_action)
+        action = _parse_action_cached(first_action)
         if not action:
             return 0.0
 
-        tool = action.get("tool", "").lower()
-        return 1.0 if tool in VALID_TOOLS else 0.0
+        # Models usually emit lowercase names already; only lower() on a miss
+        tool = action.get("tool", "")
+        return 1.0 if tool in VALID_TOOLS or tool.lower() in VALID_TOOLS else 0.0
 
     except Exception as e:
-        logger.debug(f"Tool validity check failed: {e}")
+        logger.debug("Tool validity check failed: %s", e)
         return 0.0
 
 
+def tool_validity_score_batch(predictions: list) -> list[float]:
+    """
+    tool_validity_score over many predictions.
+
+    Repeated first_action strings are not re-parsed: parses are memoized
+    by _parse_action_cached, which tool_validity_score goes through.
+
+    Args:
+        predictions: dspy.Predictions
+
+    Returns:
+        Scores from 0.0 to 1.0, in input order
+    """
+    return [tool_validity_score(prediction) for prediction in predictions]
+
+
 def reasoning_quality_score(example: Any, prediction: Any) -> float:
     """
     Score: Does the reasoning mention relevant files/concepts from context?
@@ -155,24 +216,30 @@ def reasoning_quality_score(example: Any, prediction: Any) -> float:
             return 0.0
 
         environment = getattr(example, 'environment_context', '')
-        relevant_terms = extract_relevant_terms(environment)
+        lowered_terms = _lowered_terms_cached(environment)
 
-        if not relevant_terms:
+        if not lowered_terms:
             return 0.5  # Neutral if no terms to check
 
         # Check how many relevant terms appear in reasoning
         reasoning_lower = reasoning.lower()
-        mentions = sum(1 for term in relevant_terms if term.lower() in reasoning_lower)
+        mentions = sum([term in reasoning_lower for term in lowered_terms])
 
         # Score based on coverage
-        coverage = mentions / len(relevant_terms)
+        coverage = mentions / len(lowered_terms)
         return min(coverage, 1.0)
 
     except Exception as e:
-        logger.debug(f"Reasoning quality check failed: {e}")
+        logger.debug("Reasoning quality check failed: %s", e)
         return 0.0
 
 
+@lru_cache(maxsize=1024)
+def _expected_tool_set(expected_tools: tuple) -> frozenset:
+    """Set of the first 5 expected tools, memoized per (hashable) tool tuple."""
+    return frozenset(expected_tools[:5])
+
+
 def plan_coherence_score(example: Any, prediction: Any) -> float:
     """
     Score: Does the plan match expected tool sequence?
@@ -185,12 +252,9 @@ def plan_coherence_score(example: Any, prediction: Any) -> float:
         Score from 0.0 to 1.0
     """
     try:
-        if not hasattr(example, 'expected_tools'):
-            return 0.5  # Neutral if no ground truth
-
-        expected_tools = getattr(example, 'expected_tools', [])
+        expected_tools = getattr(example, 'expected_tools', None)
         if not expected_tools:
-            return 0.5
+            return 0.5  # Neutral if no ground truth
 
         tool_plan = getattr(prediction, 'tool_plan', '')
         if not tool_plan:
@@ -198,8 +262,12 @@ def plan_coherence_score(example: Any, prediction: Any) -> float:
 
         planned_tools = extract_tools_from_plan(tool_plan)
 
-        # Calculate overlap
-        expected_set = set(expected_tools[:5])  # First 5 tools
+        # Calculate overlap (first 5 tools). ExampleBuilder stores expected_tools
+        # as shared tuples, so their sets are built once and reused
+        if type(expected_tools) is tuple:
+            expected_set = _expected_tool_set(expected_tools)
+        else:
+            expected_set = set(expected_tools[:5])
         planned_set = set(planned_tools[:5])
 
         if not expected_set:
@@ -209,7 +277,7 @@ def plan_coherence_score(example: Any, prediction: Any) -> float:
         return overlap / len(expected_set)
 
     except Exception as e:
-        logger.debug(f"Plan coherence check failed: {e}")
+        logger.debug("Plan coherence check failed: %s", e)
         return 0.0
 
 
@@ -225,21 +293,24 @@ def first_action_match_score(example: Any, prediction: Any) -> float:
         Score from 0.0 to 1.0
     """
     try:
-        if not hasattr(example, 'expected_first_action'):
-            return 0.5  # Neutral if no ground truth
-
-        expected = getattr(example, 'expected_first_action')
+        expected = getattr(example, 'expected_first_action', None)
         if not expected:
-            return 0.5
+            return 0.5  # Neutral if no ground truth
 
         first_action = getattr(prediction, 'first_action', '')
-        predicted = parse_action_json(first_action)
+
+        # Cheap reject: an action naming the expected tool must contain it
+        expected_tool = expected.get('tool')
+        if isinstance(expected_tool, str) and expected_tool not in first_action:
+            return 0.0
+
+        predicted = _parse_action_cached(first_action)
 
         if not predicted:
             return 0.0
 
         # Check tool match
-        if predicted.get('tool') != expected.get('tool'):
+        if predicted.get('tool') != expected_tool:
             return 0.0
 
         # Tool matches - give partial credit
@@ -248,9 +319,11 @@ def first_action_match_score(example: Any, prediction: Any) -> float:
         # Check critical args if specified
         critical_args = expected.get('critical_args', [])
         if critical_args:
+            predicted_args = predicted.get('args', {})
+            expected_args = expected.get('args', {})
             args_match = sum(
                 1 for arg in critical_args
-                if predicted.get('args', {}).get(arg) == expected.get('args', {}).get(arg)
+                if predicted_args.get(arg) == expected_args.get(arg)
             )
             score += 0.5 * (args_match / len(critical_args))
         else:
@@ -260,7 +333,7 @@ def first_action_match_score(example: Any, prediction: Any) -> float:
         return score
 
     except Exception as e:
-        logger.debug(f"First action match check failed: {e}")
+        logger.debug("First action match check failed: %s", e)
         return 0.0
 
 
@@ -294,7 +367,7 @@ def efficiency_score(prediction: Any) -> float:
             return max(0.3, 1.0 - (length - 1000) / 2000)
 
     except Exception as e:
-        logger.debug(f"Efficiency check failed: {e}")
+        logger.debug("Efficiency check failed: %s", e)
         return 0.5
 
 
@@ -316,44 +389,74 @@ def composite_metric(
     Returns:
         Score from 0.0 to 1.0
     """
-    # DEBUG: Log prediction details to verify fresh generation
-    task = getattr(example, 'task_description', '')[:50] if hasattr(example, 'task_description') else 'unknown'
-    first_action = getattr(prediction, 'first_action', '')[:50] if hasattr(prediction, 'first_action') else 'none'
-    logger.debug(f"Evaluating: task={task}... action={first_action}...")
-
-    scores = []
-    weights = []
-
-    # Tool validity (critical)
-    tool_score = tool_validity_score(prediction)
-    scores.append(tool_score)
-    weights.append(3.0)  # High weight - must be valid
-
-    # Reasoning quality
-    reasoning_score = reasoning_quality_score(example, prediction)
-    scores.append(reasoning_score)
-    weights.append(1.0)
-
-    # Plan coherence
-    plan_score = plan_coherence_score(example, prediction)
-    scores.append(plan_score)
-    weights.append(2.0)  # Important
-
-    # First action match
-    action_score = first_action_match_score(example, prediction)
-    scores.append(action_score)
-    weights.append(2.0)  # Important
-
-    # Efficiency
-    eff_score = efficiency_score(prediction)
-    scores.append(eff_score)
-    weights.append(1.0)
-
-    # Weighted average
-    total_weight = sum(weights)
-    weighted_sum = sum(s * w for s, w in zip(scores, weights))
-
-    return weighted_sum / total_weight
+    # DEBUG: Log prediction details to verify fresh generation (the slices are
+    # only taken when debug logging is on)
+    if logger.isEnabledFor(logging.DEBUG):
+        task = getattr(example, 'task_description', 'unknown')[:50]
+        first_action = getattr(prediction, 'first_action', 'none')[:50]
+        logger.debug("Evaluating: task=%s... action=%s...", task, first_action)
+
+    # Weighted average, unrolled (same terms and summation order as
+    # COMPOSITE_WEIGHTS, so results are unchanged)
+    weighted_sum = (
+        tool_validity_score(prediction) * _W_TOOL
+        + reasoning_quality_score(example, prediction) * _W_REASONING
+        + plan_coherence_score(example, prediction) * _W_PLAN
+        + first_action_match_score(example, prediction) * _W_ACTION
+        + efficiency_score(prediction) * _W_EFFICIENCY
+    )
+
+    return weighted_sum / _TOTAL_WEIGHT
+
+
+def composite_metric_batch(examples: list, predictions: list) -> list[float]:
+    """
+    composite_metric over many (example, prediction) pairs.
+
+    With numpy, the per-pair criteria fill a score matrix, the efficiency
+    column is computed from reasoning lengths in one vectorized pass, and
+    the weighting is a single matrix-vector product. Results match
+    composite_metric up to float rounding.
+
+    Args:
+        examples: dspy.Examples
+        predictions: dspy.Predictions, aligned with examples
+
+    Returns:
+        Scores from 0.0 to 1.0, in input order
+    """
+    if len(examples) != len(predictions):
+        raise ValueError(
+            f"Got {len(examples)} examples but {len(predictions)} predictions"
+        )
+
+    if np is None:
+        return [composite_metric(ex, pred) for ex, pred in zip(examples, predictions)]
+
+    n = len(predictions)
+    scores = np.empty((n, len(_WEIGHT_VALUES)))
+    lengths = np.empty(n)
+
+    # Same column order as COMPOSITE_WEIGHTS
+    scores[:, 0] = tool_validity_score_batch(predictions)
+    for i, (example, prediction) in enumerate(zip(examples, predictions)):
+        row = scores[i]
+        row[1] = reasoning_quality_score(example, prediction)
+        row[2] = plan_coherence_score(example, prediction)
+        row[3] = first_action_match_score(example, prediction)
+        try:
+            lengths[i] = len(getattr(prediction, 'reasoning', ''))
+        except TypeError:
+            lengths[i] = np.nan  # No usable reasoning: neutral 0.5, as efficiency_score
+
+    # Same bands as efficiency_score (NaN matches no condition -> default)
+    scores[:, 4] = np.select(
+        [lengths < 100, (lengths >= 200) & (lengths <= 500), lengths <= 1000, lengths > 1000],
+        [0.5, 1.0, 0.8, np.maximum(0.3, 1.0 - (lengths - 1000) / 2000)],
+        default=0.5
+    )
+
+    return (scores @ _WEIGHT_ARRAY).tolist()
 
 
 def correctness_metric(
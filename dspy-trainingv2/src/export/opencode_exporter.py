@@ -7,6 +7,7 @@ Supports multiple export formats:
 - Prompt template (full .txt template file)
 """
 
+import io
 import json
 import logging
 from datetime import datetime
@@ -18,8 +19,16 @@ try:
 except ImportError:
     dspy = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Demo field key -> display title (e.g. "task_description" -> "Task Description")
+_FIELD_TITLES: dict[str, str] = {}
+
 
 class OpenCodeExporter:
     """Export optimized prompts in OpenCode-compatible formats."""
@@ -44,37 +53,44 @@ class OpenCodeExporter:
         Returns:
             Extracted prompt string
         """
-        # Debug: Log module structure
-        logger.debug(f"Module type: {type(module)}")
-        logger.debug(f"Module attributes: {dir(module)}")
+        # Debug logging is gated so its formatting costs nothing when disabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"Module type: {type(module).__name__}")
 
         # Try different extraction methods based on module type
 
         # Method 1: Check all named_predictors (BootstrapFewShot uses this)
         if hasattr(module, 'named_predictors'):
-            logger.debug("Module has named_predictors")
+            if debug:
+                logger.debug("Module has named_predictors")
             all_demos = []
             for name, predictor in module.named_predictors():
-                logger.debug(f"Checking predictor: {name}, type: {type(predictor)}")
-                if hasattr(predictor, 'demos') and predictor.demos:
-                    logger.info(f"Found {len(predictor.demos)} demonstrations in predictor '{name}'")
-                    all_demos.extend(predictor.demos)
+                if debug:
+                    logger.debug(f"Checking predictor: {name}, type: {type(predictor)}")
+                demos = getattr(predictor, 'demos', None)
+                if demos:
+                    logger.info(f"Found {len(demos)} demonstrations in predictor '{name}'")
+                    all_demos.extend(demos)
 
             if all_demos:
                 return self._format_demos(all_demos)
 
         # Method 2: BootstrapFewShot stores demos in predictor.demos
-        if hasattr(module, 'planner'):
-            planner = module.planner
-            logger.debug(f"Planner type: {type(planner)}")
+        planner = getattr(module, 'planner', None)
+        if planner is not None:
+            if debug:
+                logger.debug(f"Planner type: {type(planner)}")
 
             # Check if demos attribute exists (might be empty list)
             if hasattr(planner, 'demos'):
-                logger.debug(f"Planner has 'demos' attribute: {type(planner.demos)}, length: {len(planner.demos) if hasattr(planner.demos, '__len__') else 'N/A'}")
-                if planner.demos:  # Not empty
-                    logger.info(f"Found {len(planner.demos)} demonstrations in planner.demos")
-                    return self._format_demos(planner.demos)
-                else:
+                demos = planner.demos
+                if debug:
+                    logger.debug(f"Planner has 'demos' attribute: {type(demos)}, length: {len(demos) if hasattr(demos, '__len__') else 'N/A'}")
+                if demos:  # Not empty
+                    logger.info(f"Found {len(demos)} demonstrations in planner.demos")
+                    return self._format_demos(demos)
+                elif debug:
                     logger.debug("Planner.demos exists but is empty")
 
             # Also check for extended_signature with demos
@@ -89,16 +105,15 @@ class OpenCodeExporter:
             logger.info(f"Found {len(module.demos)} demonstrations at module level")
             return self._format_demos(module.demos)
 
-        # Method 4: ChainOfThought modules might store prompt in signature docstring
-        if hasattr(module, 'planner') and hasattr(module.planner, 'signature'):
-            sig = module.planner.signature
+        if planner is not None and hasattr(planner, 'signature'):
+            sig = planner.signature
+
+            # Method 4: ChainOfThought modules might store prompt in signature docstring
             if hasattr(sig, '__doc__') and sig.__doc__:
                 logger.info("Extracted prompt from signature docstring")
                 return sig.__doc__
 
-        # Method 5: Check for instructions in signature
-        if hasattr(module, 'planner') and hasattr(module.planner, 'signature'):
-            sig = module.planner.signature
+            # Method 5: Check for instructions in signature
             if hasattr(sig, 'instructions') and sig.instructions:
                 logger.info("Extracted instructions from signature")
                 return sig.instructions
@@ -113,11 +128,13 @@ class OpenCodeExporter:
 
     def _format_demos(self, demos: list) -> str:
         """Format few-shot demonstrations as a prompt."""
-        parts = ["# Few-Shot Demonstrations\n"]
-        parts.append("These examples show how to approach coding tasks effectively.\n")
+        buf = io.StringIO()
+        write = buf.write
+        write("# Few-Shot Demonstrations\n")
+        write("\nThese examples show how to approach coding tasks effectively.\n")
 
         for i, demo in enumerate(demos, 1):
-            parts.append(f"\n## Example {i}\n")
+            write(f"\n\n## Example {i}\n")
 
             # Extract all available fields from the demo
             demo_dict = demo.toDict() if hasattr(demo, 'toDict') else vars(demo)
@@ -127,11 +144,13 @@ class OpenCodeExporter:
                 if key.startswith('_'):
                     continue
 
-                # Format field name nicely
-                field_name = key.replace('_', ' ').title()
-                parts.append(f"**{field_name}:** {value}\n")
+                # Format field name nicely (demos share the same few keys)
+                field_name = _FIELD_TITLES.get(key)
+                if field_name is None:
+                    field_name = _FIELD_TITLES[key] = key.replace('_', ' ').title()
+                write(f"\n**{field_name}:** {value}\n")
 
-        return "\n".join(parts)
+        return buf.getvalue()
 
     def _format_module_structure(self, module: "dspy.Module") -> str:
         """
@@ -183,7 +202,8 @@ class OpenCodeExporter:
         agent_name: str,
         model_name: str,
         baseline_score: float = 0.0,
-        optimized_score: float = 0.0
+        optimized_score: float = 0.0,
+        prompt: Optional[str] = None
     ) -> Path:
         """
         Export as opencode.jsonc agent configuration snippet.
@@ -197,15 +217,18 @@ class OpenCodeExporter:
             model_name: Target model name
             baseline_score: Baseline score before optimization
             optimized_score: Score after optimization
+            prompt: Already-extracted prompt (extracted from the module if None)
 
         Returns:
             Path to exported file
         """
-        prompt = self.extract_instruction_prompt(optimized_module)
+        if prompt is None:
+            prompt = self.extract_instruction_prompt(optimized_module)
+        generated = datetime.now().isoformat()
 
         config = {
             "_comment": f"Optimized {agent_name} agent prompt for {model_name}",
-            "_generated": datetime.now().isoformat(),
+            "_generated": generated,
             "_baseline_score": float(baseline_score),
             "_optimized_score": float(optimized_score),
             "_improvement": float(optimized_score - baseline_score),
@@ -219,17 +242,29 @@ class OpenCodeExporter:
         # Save as JSONC (JSON with comments)
         output_path = self.output_dir / f"opencode-{agent_name}-{model_name.replace('/', '-')}.jsonc"
 
-        with open(output_path, 'w') as f:
-            f.write(f"// Optimized {agent_name} agent prompt\n")
-            f.write(f"// Generated: {datetime.now().isoformat()}\n")
-            f.write(f"// Target model: {model_name}\n")
-            f.write(f"// Baseline score: {baseline_score:.3f}\n")
-            f.write(f"// Optimized score: {optimized_score:.3f}\n")
-            f.write(f"// Improvement: {optimized_score - baseline_score:+.3f}\n")
-            f.write("//\n")
-            f.write("// To use: Copy the 'agent' section to your opencode.jsonc\n")
-            f.write("\n")
-            f.write(json.dumps(config, indent=2))
+        header = "".join([
+            f"// Optimized {agent_name} agent prompt\n",
+            f"// Generated: {generated}\n",
+            f"// Target model: {model_name}\n",
+            f"// Baseline score: {baseline_score:.3f}\n",
+            f"// Optimized score: {optimized_score:.3f}\n",
+            f"// Improvement: {optimized_score - baseline_score:+.3f}\n",
+            "//\n",
+            "// To use: Copy the 'agent' section to your opencode.jsonc\n",
+            "\n",
+        ])
+
+        # Write the JSON straight to the file rather than building one
+        # combined string first: orjson's UTF-8 bytes go out as-is (no decode
+        # and re-encode), and json.dump streams its chunks
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(header.encode('utf-8'))
+                f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(header)
+                json.dump(config, f, indent=2)
 
         logger.info(f"Exported agent config to {output_path}")
         return output_path
@@ -237,7 +272,8 @@ class OpenCodeExporter:
     def export_custom_instructions(
         self,
         optimized_module: "dspy.Module",
-        filename: str = "OPTIMIZED_AGENT.md"
+        filename: str = "OPTIMIZED_AGENT.md",
+        prompt: Optional[str] = None
     ) -> Path:
         """
         Export as AGENTS.md / CLAUDE.md compatible markdown file.
@@ -247,11 +283,13 @@ class OpenCodeExporter:
         Args:
             optimized_module: Optimized DSPy module
             filename: Output filename
+            prompt: Already-extracted prompt (extracted from the module if None)
 
         Returns:
             Path to exported file
         """
-        prompt = self.extract_instruction_prompt(optimized_module)
+        if prompt is None:
+            prompt = self.extract_instruction_prompt(optimized_module)
 
         content = f"""# Optimized Agent Instructions
 
@@ -285,7 +323,8 @@ Add this to your OpenCode custom instructions by:
         self,
         optimized_module: "dspy.Module",
         model_name: str,
-        base_template: Optional[str] = None
+        base_template: Optional[str] = None,
+        prompt: Optional[str] = None
     ) -> Path:
         """
         Export as a complete prompt template file.
@@ -296,11 +335,13 @@ Add this to your OpenCode custom instructions by:
             optimized_module: Optimized DSPy module
             model_name: Model name for filename
             base_template: Optional base template to merge with
+            prompt: Already-extracted prompt (extracted from the module if None)
 
         Returns:
             Path to exported file
         """
-        prompt = self.extract_instruction_prompt(optimized_module)
+        if prompt is None:
+            prompt = self.extract_instruction_prompt(optimized_module)
 
         # If we have a base template, merge with it
         if base_template:
@@ -339,17 +380,22 @@ Add this to your OpenCode custom instructions by:
         """
         exports = {}
 
+        # Extract (and format demos) once, shared by all three formats
+        prompt = self.extract_instruction_prompt(optimized_module)
+
         exports['agent_config'] = self.export_agent_config(
-            optimized_module, agent_name, model_name, baseline_score, optimized_score
+            optimized_module, agent_name, model_name, baseline_score, optimized_score,
+            prompt=prompt
         )
 
         exports['custom_instructions'] = self.export_custom_instructions(
             optimized_module,
-            filename=f"OPTIMIZED_{agent_name.upper()}.md"
+            filename=f"OPTIMIZED_{agent_name.upper()}.md",
+            prompt=prompt
         )
 
         exports['prompt_template'] = self.export_prompt_template(
-            optimized_module, model_name
+            optimized_module, model_name, prompt=prompt
         )
 
         logger.info(f"Exported {len(exports)} formats")
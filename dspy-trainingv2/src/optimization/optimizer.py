@@ -7,7 +7,11 @@ Supports multiple DSPy optimization strategies:
 - COPRO: Coordinate-ascent prompt optimization
 """
 
+import contextlib
+import hashlib
+import json
 import logging
+import threading
 from typing import Optional, Callable
 from pathlib import Path
 
@@ -26,10 +30,20 @@ except ImportError:
     COPRO = None
     MIPROv2 = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from ..dspy_modules.code_agent import OpenCodeAgent
 
 logger = logging.getLogger(__name__)
 
+# configure_dspy_lm results keyed by its arguments. Callers get copies
+# (LM.copy shares the provider client but not kwargs/history), so matching
+# teacher and student settings never yield the same mutable instance
+_LM_CACHE: dict[tuple, "dspy.LM"] = {}
+
 
 def extract_score_value(score_obj) -> float:
     """
@@ -46,13 +60,18 @@ def extract_score_value(score_obj) -> float:
     Returns:
         Numeric score as float
     """
-    # If it's already a number, return it
-    if isinstance(score_obj, (int, float)):
+    # If it's already a number, return it (exact-type checks first; int/float
+    # subclasses such as bool or numpy floats fall through to float() below)
+    score_type = type(score_obj)
+    if score_type is float:
+        return score_obj
+    if score_type is int:
         return float(score_obj)
 
     # If it has a .score attribute (EvaluationResult)
-    if hasattr(score_obj, 'score'):
-        return float(score_obj.score)
+    score = getattr(score_obj, 'score', None)
+    if score is not None:
+        return float(score)
 
     # If it's a dict with 'score' key
     if isinstance(score_obj, dict) and 'score' in score_obj:
@@ -66,6 +85,85 @@ def extract_score_value(score_obj) -> float:
         return 0.0
 
 
+def _adjust_ollama_model(model: str, api_base: Optional[str]) -> str:
+    """LiteLLM model name for Ollama (OpenAI-compatible /v1 or native API)."""
+    # Check if using OpenAI-compatible endpoint (/v1)
+    if api_base and "/v1" in api_base:
+        # LiteLLM needs openai/ prefix for custom OpenAI-compatible endpoints
+        if model.startswith("openai/"):
+            return model
+        adjusted_model = f"openai/{model}"
+        logger.debug(
+            f"Ollama OpenAI-compatible endpoint detected ({api_base}). "
+            f"Using openai/ prefix: {model} -> {adjusted_model}"
+        )
+        return adjusted_model
+
+    # Using native Ollama API - need ollama_chat/ prefix
+    adjusted_model = model
+    if not model.startswith(("ollama/", "ollama_chat/")):
+        adjusted_model = f"ollama_chat/{model}"
+        logger.debug(f"Ollama native API: {model} -> {adjusted_model}")
+
+    if not api_base:
+        logger.warning(
+            "Ollama provider with native API requires api_base. "
+            "Using default http://localhost:11434 may not work correctly."
+        )
+    return adjusted_model
+
+
+def _adjust_anthropic_model(model: str, api_base: Optional[str]) -> str:
+    """Anthropic models use their default naming."""
+    logger.debug(f"Configuring Anthropic model: {model}")
+    return model
+
+
+# Model names LiteLLM already routes to the OpenAI protocol
+_OPENAI_MODEL_PREFIXES = ("gpt-", "o1-", "openai/", "text-")
+
+
+def _adjust_openai_model(model: str, api_base: Optional[str]) -> str:
+    """LiteLLM model name for OpenAI models or OpenAI-compatible endpoints."""
+    if not api_base:
+        # Standard OpenAI endpoint
+        logger.debug(f"Configuring OpenAI model: {model}")
+        return model
+
+    # Custom endpoint: if the model name doesn't look like an OpenAI model, add
+    # the openai/ prefix so LiteLLM uses OpenAI protocol with the custom endpoint
+    if model.startswith(_OPENAI_MODEL_PREFIXES):
+        logger.debug(f"Configuring OpenAI model: {model} at {api_base}")
+        return model
+
+    adjusted_model = f"openai/{model}"
+    logger.debug(
+        f"Custom OpenAI endpoint with non-OpenAI model detected. "
+        f"Using openai/ prefix: {model} -> {adjusted_model} at {api_base}"
+    )
+    return adjusted_model
+
+
+def _adjust_openai_compatible_model(model: str, api_base: Optional[str]) -> str:
+    """OpenAI-compatible endpoints use the model name as-is (api_base required)."""
+    if not api_base:
+        logger.warning(
+            "OpenAI-compatible provider requires api_base. "
+            "Using default may not work correctly."
+        )
+    logger.debug(f"Configuring OpenAI-compatible model: {model} at {api_base}")
+    return model
+
+
+# Provider -> function(model, api_base) returning the LiteLLM model name
+_MODEL_ADJUSTERS = {
+    "ollama": _adjust_ollama_model,
+    "anthropic": _adjust_anthropic_model,
+    "openai": _adjust_openai_model,
+    "openai-compatible": _adjust_openai_compatible_model,
+}
+
+
 def configure_dspy_lm(
     model: str,
     provider: str = "openai",
@@ -76,6 +174,8 @@ def configure_dspy_lm(
     """
     Configure a DSPy language model with provider-specific settings.
 
+    Instances are cached per argument combination and shared between callers.
+
     Args:
         model: Model identifier (e.g., "gpt-4o", "claude-sonnet-4-5", "qwen2.5-coder:32b")
         provider: Provider type (openai, anthropic, openai-compatible, ollama)
@@ -89,69 +189,19 @@ def configure_dspy_lm(
     if dspy is None:
         raise ImportError("DSPy is required. Install with: pip install dspy-ai")
 
-    # Adjust model name based on provider for LiteLLM compatibility
-    adjusted_model = model
-
-    # Provider-specific configuration
-    if provider == "ollama":
-        # Check if using OpenAI-compatible endpoint (/v1)
-        if api_base and "/v1" in api_base:
-            # Using OpenAI-compatible Ollama endpoint
-            # LiteLLM needs openai/ prefix for custom OpenAI-compatible endpoints
-            if not model.startswith("openai/"):
-                adjusted_model = f"openai/{model}"
-                logger.debug(
-                    f"Ollama OpenAI-compatible endpoint detected ({api_base}). "
-                    f"Using openai/ prefix: {model} -> {adjusted_model}"
-                )
-        else:
-            # Using native Ollama API - need ollama_chat/ prefix
-            if not model.startswith("ollama/") and not model.startswith("ollama_chat/"):
-                adjusted_model = f"ollama_chat/{model}"
-                logger.debug(f"Ollama native API: {model} -> {adjusted_model}")
-
-            if not api_base:
-                logger.warning(
-                    "Ollama provider with native API requires api_base. "
-                    "Using default http://localhost:11434 may not work correctly."
-                )
-
-    elif provider == "anthropic":
-        # Anthropic models - use default naming
-        logger.debug(f"Configuring Anthropic model: {model}")
-
-    elif provider == "openai":
-        # OpenAI models or OpenAI-compatible endpoints
-        if api_base:
-            # Custom OpenAI-compatible endpoint
-            # If model name doesn't look like an OpenAI model, add openai/ prefix
-            # so LiteLLM uses OpenAI protocol with the custom endpoint
-            openai_model_prefixes = ("gpt-", "o1-", "openai/", "text-")
-            if not model.startswith(openai_model_prefixes):
-                adjusted_model = f"openai/{model}"
-                logger.debug(
-                    f"Custom OpenAI endpoint with non-OpenAI model detected. "
-                    f"Using openai/ prefix: {model} -> {adjusted_model} at {api_base}"
-                )
-            else:
-                logger.debug(f"Configuring OpenAI model: {model} at {api_base}")
-        else:
-            # Standard OpenAI endpoint
-            logger.debug(f"Configuring OpenAI model: {model}")
-
-    elif provider == "openai-compatible":
-        # OpenAI-compatible endpoints
-        # For most OpenAI-compatible APIs, we use the model name as-is
-        # but ensure api_base is set
-        if not api_base:
-            logger.warning(
-                "OpenAI-compatible provider requires api_base. "
-                "Using default may not work correctly."
-            )
-        logger.debug(f"Configuring OpenAI-compatible model: {model} at {api_base}")
+    cache_key = (model, provider, api_base, api_key, temperature)
+    cached = _LM_CACHE.get(cache_key)
+    if cached is not None:
+        logger.debug(f"Reusing configured {provider} model: {cached.model}")
+        return cached.copy()
 
-    else:
+    # Adjust model name based on provider for LiteLLM compatibility
+    adjuster = _MODEL_ADJUSTERS.get(provider)
+    if adjuster is None:
         logger.warning(f"Unknown provider '{provider}', using default DSPy LM initialization")
+        adjusted_model = model
+    else:
+        adjusted_model = adjuster(model, api_base)
 
     # Build kwargs for LM initialization
     lm_kwargs = {
@@ -181,7 +231,8 @@ def configure_dspy_lm(
     try:
         lm = dspy.LM(**lm_kwargs)
         logger.info(f"Successfully configured {provider} model: {adjusted_model}")
-        return lm
+        _LM_CACHE[cache_key] = lm
+        return lm.copy()
     except Exception as e:
         logger.error(
             f"Failed to configure LM with provider={provider}, "
@@ -191,6 +242,51 @@ def configure_dspy_lm(
         raise
 
 
+@contextlib.contextmanager
+def _bypass_lm_cache(lm: "dspy.LM", role: str):
+    """
+    Temporarily raise a zero temperature to 0.001 so DSPy's cache is bypassed.
+
+    DSPy caches LM calls by prompt, model and temperature, so the nudge forces
+    fresh responses while barely changing sampling. The original temperature
+    is restored on exit, also when the body raises.
+
+    Args:
+        lm: DSPy LM to adjust
+        role: Name used in log messages ("teacher" or "student")
+    """
+    original_temp = lm.kwargs.get('temperature', 0.0)
+    if original_temp != 0.0:
+        logger.debug(f"{role.capitalize()} already has non-zero temperature ({original_temp}), cache bypassed")
+        yield
+        return
+
+    logger.info(f"Temporarily setting {role} temperature=0.001 to bypass DSPy cache...")
+    lm.kwargs['temperature'] = 0.001
+    try:
+        yield
+    finally:
+        lm.kwargs['temperature'] = original_temp
+        logger.debug(f"Restored {role} temperature to {original_temp}")
+
+
+def _examples_fingerprint(examples: list) -> str:
+    """
+    Content hash of a list of dspy.Examples (order-sensitive).
+
+    Args:
+        examples: Examples to fingerprint
+
+    Returns:
+        Hex digest identifying the examples' fields and values
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for example in examples:
+        h.update(json.dumps(example.toDict(), sort_keys=True, default=str).encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
 class PromptOptimizer:
     """
     Main optimization orchestrator.
@@ -209,7 +305,10 @@ class PromptOptimizer:
         teacher_api_key: Optional[str] = None,
         student_api_key: Optional[str] = None,
         teacher_temperature: float = 0.0,
-        student_temperature: float = 0.0
+        student_temperature: float = 0.0,
+        num_threads: int = 1,
+        display_progress: bool = True,
+        reuse_teacher_cache: bool = False
     ):
         """
         Initialize the optimizer.
@@ -225,6 +324,12 @@ class PromptOptimizer:
             student_api_key: Optional API key for student
             teacher_temperature: Temperature for teacher model
             student_temperature: Temperature for student model
+            num_threads: Parallel threads for evaluation and MIPROv2 trials
+                (LM calls are I/O-bound, so this overlaps request latency)
+            display_progress: Whether to show evaluation progress
+            reuse_teacher_cache: Let MIPROv2/COPRO reuse DSPy's cached teacher
+                responses (identical reruns then make no teacher calls) instead
+                of nudging temperature to force fresh ones
         """
         if dspy is None:
             raise ImportError("DSPy is required. Install with: pip install dspy-ai")
@@ -246,8 +351,22 @@ class PromptOptimizer:
             temperature=student_temperature
         )
 
+        self.num_threads = max(1, int(num_threads))
+        self.display_progress = display_progress
+        self.reuse_teacher_cache = reuse_teacher_cache
+
+        # evaluate_baseline results keyed by (student model, examples, metric)
+        self._baseline_cache: dict[tuple, dict] = {}
+
         logger.info(f"Initialized optimizer with teacher={teacher_model} ({teacher_provider}), student={student_model} ({student_provider})")
 
+    def _teacher_cache_context(self):
+        """Context for teacher-driven optimization: bypass or reuse DSPy's cache."""
+        if self.reuse_teacher_cache:
+            logger.info("Reusing cached teacher responses (reuse_teacher_cache=True)")
+            return contextlib.nullcontext()
+        return _bypass_lm_cache(self.teacher, "teacher")
+
     def optimize_bootstrap(
         self,
         trainset: list,
@@ -255,7 +374,8 @@ class PromptOptimizer:
         metric: Callable,
         max_bootstrapped_demos: int = 4,
         max_labeled_demos: int = 4,
-        max_rounds: int = 1
+        max_rounds: int = 1,
+        metric_threshold: Optional[float] = None
     ) -> tuple:
         """
         BootstrapFewShot: Generate demonstrations from teacher, select best ones.
@@ -269,6 +389,8 @@ class PromptOptimizer:
             max_bootstrapped_demos: Max demonstrations to generate
             max_labeled_demos: Max labeled examples to include
             max_rounds: Max optimization rounds
+            metric_threshold: Minimum metric score for a teacher trace to be kept
+                as a demonstration (None keeps any trace the metric accepts)
 
         Returns:
             Tuple of (optimized_agent, evaluation_results)
@@ -284,38 +406,33 @@ class PromptOptimizer:
         #   1. Clear the cache: rm -rf ~/.dspy_cache/*
         #   2. Use --no-cache flag (adds small temperature variation)
         #   3. Change the training data or model
-        original_teacher_temp = self.teacher.kwargs.get('temperature', 0.0)
+        with dspy.context(lm=self.teacher):
+            # DEBUG: Verify context is set to teacher
+            logger.debug(f"Current DSPy LM inside optimization context: {dspy.settings.lm}")
+            logger.info(f"Optimizing with TEACHER model: {dspy.settings.lm.model if hasattr(dspy.settings.lm, 'model') else 'unknown'}")
+
+            # Track teacher LM calls
+            teacher_history_before = len(self.teacher.history)
+            logger.debug(f"Teacher LM history before bootstrap: {teacher_history_before}")
+
+            # Only passed when set, so older DSPy versions keep working
+            threshold_kwargs = {} if metric_threshold is None else {"metric_threshold": metric_threshold}
+            optimizer = BootstrapFewShot(
+                metric=metric,
+                max_bootstrapped_demos=max_bootstrapped_demos,
+                max_labeled_demos=max_labeled_demos,
+                max_rounds=max_rounds,
+                **threshold_kwargs
+            )
 
-        try:
-            with dspy.context(lm=self.teacher):
-                # DEBUG: Verify context is set to teacher
-                logger.debug(f"Current DSPy LM inside optimization context: {dspy.settings.lm}")
-                logger.info(f"Optimizing with TEACHER model: {dspy.settings.lm.model if hasattr(dspy.settings.lm, 'model') else 'unknown'}")
-
-                # Track teacher LM calls
-                teacher_history_before = len(self.teacher.history)
-                logger.debug(f"Teacher LM history before bootstrap: {teacher_history_before}")
-
-                optimizer = BootstrapFewShot(
-                    metric=metric,
-                    max_bootstrapped_demos=max_bootstrapped_demos,
-                    max_labeled_demos=max_labeled_demos,
-                    max_rounds=max_rounds
-                )
-
-                optimized = optimizer.compile(
-                    OpenCodeAgent(),
-                    trainset=trainset
-                )
-
-                teacher_history_after = len(self.teacher.history)
-                teacher_calls_made = teacher_history_after - teacher_history_before
-                logger.info(f"Bootstrap complete: teacher made {teacher_calls_made} LLM calls")
-        finally:
-            # Always restore original temperature
-            if original_teacher_temp == 0.0:
-                self.teacher.kwargs['temperature'] = original_teacher_temp
-                logger.debug(f"Restored teacher temperature to {original_teacher_temp}")
+            optimized = optimizer.compile(
+                OpenCodeAgent(),
+                trainset=trainset
+            )
+
+            teacher_history_after = len(self.teacher.history)
+            teacher_calls_made = teacher_history_after - teacher_history_before
+            logger.info(f"Bootstrap complete: teacher made {teacher_calls_made} LLM calls")
 
         # Evaluate on student model
         logger.info("Evaluating optimized agent on student model...")
@@ -330,7 +447,8 @@ class PromptOptimizer:
         metric: Callable,
         num_candidates: int = 10,
         init_temperature: float = 1.0,
-        minibatch_size: int = None
+        minibatch_size: int = None,
+        metric_threshold: Optional[float] = None
     ) -> tuple:
         """
         MIPROv2: Multi-prompt instruction optimization.
@@ -345,6 +463,8 @@ class PromptOptimizer:
             num_candidates: Number of prompt candidates to generate
             init_temperature: Initial temperature for generation
             minibatch_size: Size of minibatches for evaluation (defaults to min(25, len(valset)))
+            metric_threshold: Minimum metric score for a bootstrapped trace to be
+                kept as a demonstration candidate (None keeps any accepted trace)
 
         Returns:
             Tuple of (optimized_agent, evaluation_results)
@@ -366,37 +486,27 @@ class PromptOptimizer:
             )
             minibatch_size = len(valset)
 
-        # CRITICAL: Bypass DSPy cache for teacher model
-        original_teacher_temp = self.teacher.kwargs.get('temperature', 0.0)
-        if original_teacher_temp == 0.0:
-            logger.info("Temporarily setting teacher temperature=0.001 to bypass DSPy cache...")
-            self.teacher.kwargs['temperature'] = 0.001
-        else:
-            logger.debug(f"Teacher already has non-zero temperature ({original_teacher_temp}), cache bypassed")
+        # CRITICAL: Bypass DSPy cache for teacher model (unless reuse is requested)
+        with self._teacher_cache_context(), dspy.context(lm=self.teacher):
+            # Note: Setting auto=None to allow manual control of num_candidates and num_trials
+            # Alternative: Remove num_candidates/num_trials and let auto='light'/'medium'/'heavy'
+            threshold_kwargs = {} if metric_threshold is None else {"metric_threshold": metric_threshold}
+            optimizer = MIPROv2(
+                metric=metric,
+                auto=None,  # Disable auto mode to use manual parameters
+                num_candidates=num_candidates,
+                init_temperature=init_temperature,
+                num_threads=self.num_threads,
+                **threshold_kwargs
+            )
 
-        try:
-            with dspy.context(lm=self.teacher):
-                # Note: Setting auto=None to allow manual control of num_candidates and num_trials
-                # Alternative: Remove num_candidates/num_trials and let auto='light'/'medium'/'heavy'
-                optimizer = MIPROv2(
-                    metric=metric,
-                    auto=None,  # Disable auto mode to use manual parameters
-                    num_candidates=num_candidates,
-                    init_temperature=init_temperature
-                )
-
-                optimized = optimizer.compile(
-                    OpenCodeAgent(),
-                    trainset=trainset,
-                    num_trials=len(trainset),
-                    minibatch_size=minibatch_size,
-                    valset=valset
-                )
-        finally:
-            # Always restore original temperature
-            if original_teacher_temp == 0.0:
-                self.teacher.kwargs['temperature'] = original_teacher_temp
-                logger.debug(f"Restored teacher temperature to {original_teacher_temp}")
+            optimized = optimizer.compile(
+                OpenCodeAgent(),
+                trainset=trainset,
+                num_trials=len(trainset),
+                minibatch_size=minibatch_size,
+                valset=valset
+            )
 
         # Evaluate on student model
         logger.info("Evaluating optimized agent on student model...")
@@ -429,35 +539,26 @@ class PromptOptimizer:
         """
         logger.info("Running COPRO optimization...")
 
-        # CRITICAL: Bypass DSPy cache for teacher model
-        original_teacher_temp = self.teacher.kwargs.get('temperature', 0.0)
-        if original_teacher_temp == 0.0:
-            logger.info("Temporarily setting teacher temperature=0.001 to bypass DSPy cache...")
-            self.teacher.kwargs['temperature'] = 0.001
-        else:
-            logger.debug(f"Teacher already has non-zero temperature ({original_teacher_temp}), cache bypassed")
+        # CRITICAL: Bypass DSPy cache for teacher model (unless reuse is requested)
+        with self._teacher_cache_context(), dspy.context(lm=self.teacher):
+            optimizer = COPRO(
+                metric=metric,
+                depth=depth,
+                breadth=breadth,
+                verbose=True
+            )
 
-        try:
-            with dspy.context(lm=self.teacher):
-                optimizer = COPRO(
-                    metric=metric,
-                    depth=depth,
-                    breadth=breadth,
-                    verbose=True
-                )
-
-                # Note: COPRO requires eval_kwargs but sets devset=trainset internally
-                # So we pass eval_kwargs but don't include 'devset' to avoid conflict
-                optimized = optimizer.compile(
-                    OpenCodeAgent(),
-                    trainset=trainset,
-                    eval_kwargs={}  # Empty dict - COPRO sets devset and metric internally
-                )
-        finally:
-            # Always restore original temperature
-            if original_teacher_temp == 0.0:
-                self.teacher.kwargs['temperature'] = original_teacher_temp
-                logger.debug(f"Restored teacher temperature to {original_teacher_temp}")
+            # Note: COPRO requires eval_kwargs but sets devset=trainset internally
+            # So we pass eval_kwargs but don't include 'devset' to avoid conflict
+            optimized = optimizer.compile(
+                OpenCodeAgent(),
+                trainset=trainset,
+                # COPRO sets devset and metric internally; these go to its Evaluate
+                eval_kwargs={
+                    "num_threads": self.num_threads,
+                    "display_progress": self.display_progress
+                }
+            )
 
         # Evaluate on student model
         logger.info("Evaluating optimized agent on student model...")
@@ -470,8 +571,8 @@ class PromptOptimizer:
         module: "dspy.Module",
         examples: list,
         metric: Callable,
-        num_threads: int = 1,
-        display_progress: bool = True
+        num_threads: Optional[int] = None,
+        display_progress: Optional[bool] = None
     ) -> dict:
         """
         Evaluate optimized module on student (target) model.
@@ -480,15 +581,25 @@ class PromptOptimizer:
             module: Optimized DSPy module
             examples: Examples to evaluate on
             metric: Evaluation metric
-            num_threads: Number of parallel threads
-            display_progress: Whether to show progress
+            num_threads: Number of parallel threads (defaults to self.num_threads)
+            display_progress: Whether to show progress (defaults to self.display_progress)
 
         Returns:
             Dictionary with evaluation results
         """
+        if num_threads is None:
+            num_threads = self.num_threads
+        if display_progress is None:
+            display_progress = self.display_progress
+
+        # Debug logging is gated so its formatting costs nothing when disabled
+        # (traced_metric runs once per example)
+        debug = logger.isEnabledFor(logging.DEBUG)
+
         # DEBUG: Log which LM is configured before context
-        logger.debug(f"Student LM configured: {self.student}")
-        logger.debug(f"Current DSPy LM before context: {dspy.settings.lm if hasattr(dspy.settings, 'lm') else 'None'}")
+        if debug:
+            logger.debug(f"Student LM configured: {self.student}")
+            logger.debug(f"Current DSPy LM before context: {dspy.settings.lm if hasattr(dspy.settings, 'lm') else 'None'}")
 
         # CRITICAL: DSPy caches LM calls at temperature=0 to avoid redundant API requests.
         # This causes student evaluation to return cached predictions from previous models!
@@ -497,62 +608,68 @@ class PromptOptimizer:
         # A tiny temperature (0.001) has minimal impact on output while ensuring fresh predictions.
         # This avoids breaking DSPy's cache database structure (which clearing the cache does).
 
-        original_student_temp = self.student.kwargs.get('temperature', 0.0)
-        if original_student_temp == 0.0:
-            logger.info("Temporarily setting student temperature=0.001 to bypass DSPy cache and force fresh predictions...")
-            self.student.kwargs['temperature'] = 0.001
-        else:
-            logger.debug(f"Student already has non-zero temperature ({original_student_temp}), cache bypassed")
-
-        from copy import deepcopy
-
-        with dspy.context(lm=self.student):
+        with _bypass_lm_cache(self.student, "student"), dspy.context(lm=self.student):
             # CRITICAL: Create module INSIDE the context so it uses the student LM
             fresh_module = OpenCodeAgent()
             logger.debug("Created fresh module inside student context")
 
             # Copy demos from optimized module (if any)
             if hasattr(module, 'named_predictors') and hasattr(fresh_module, 'named_predictors'):
-                for (opt_name, opt_pred), (fresh_name, fresh_pred) in zip(
+                for (_, opt_pred), (fresh_name, fresh_pred) in zip(
                     module.named_predictors(),
                     fresh_module.named_predictors()
                 ):
-                    if hasattr(opt_pred, 'demos') and opt_pred.demos:
-                        fresh_pred.demos = deepcopy(opt_pred.demos)
-                        logger.debug(f"Copied {len(fresh_pred.demos)} demos to fresh predictor '{fresh_name}'")
+                    demos = getattr(opt_pred, 'demos', None)
+                    if demos:
+                        # Evaluation only reads demos, so the fresh predictor can
+                        # share the Example objects (a new list, not a deep copy)
+                        fresh_pred.demos = list(demos)
+                        if debug:
+                            logger.debug(f"Copied {len(fresh_pred.demos)} demos to fresh predictor '{fresh_name}'")
             # DEBUG: Verify context is set to student
-            logger.debug(f"Current DSPy LM inside context: {dspy.settings.lm}")
+            if debug:
+                logger.debug(f"Current DSPy LM inside context: {dspy.settings.lm}")
             logger.info(f"Evaluating on STUDENT model: {dspy.settings.lm.model if hasattr(dspy.settings.lm, 'model') else 'unknown'}")
 
             # Create evaluator
             from dspy.evaluate import Evaluate
 
             # DEBUG: Verify examples are not empty
-            logger.debug(f"Examples to evaluate: {len(examples)}")
+            if debug:
+                logger.debug(f"Examples to evaluate: {len(examples)}")
             if examples:
                 ex = examples[0]
-                logger.debug(f"  First example task: {getattr(ex, 'task_description', 'N/A')[:80]}")
-                logger.debug(f"  First example has answer: {hasattr(ex, 'first_action')}")
+                if debug:
+                    logger.debug(f"  First example task: {getattr(ex, 'task_description', 'N/A')[:80]}")
+                    logger.debug(f"  First example has answer: {hasattr(ex, 'first_action')}")
 
-                # CRITICAL: Check if examples have input_keys set!
-                logger.debug(f"  First example _input_keys: {getattr(ex, '_input_keys', 'MISSING!')}")
-                logger.debug(f"  First example keys: {ex.keys() if hasattr(ex, 'keys') else 'N/A'}")
+                    # CRITICAL: Check if examples have input_keys set!
+                    logger.debug(f"  First example _input_keys: {getattr(ex, '_input_keys', 'MISSING!')}")
+                    logger.debug(f"  First example keys: {ex.keys() if hasattr(ex, 'keys') else 'N/A'}")
 
-                # Try calling inputs() to see if it raises an error
+                # Try calling inputs() to see if it raises an error (always checked)
                 try:
                     inputs = ex.inputs()
-                    logger.debug(f"  First example inputs() succeeded: {list(inputs.keys())}")
+                    if debug:
+                        logger.debug(f"  First example inputs() succeeded: {list(inputs.keys())}")
                 except Exception as e:
                     logger.error(f"  First example inputs() FAILED: {e}")
                     logger.error(f"  THIS IS THE ROOT CAUSE! Examples need .with_inputs(...)")
 
-            # DEBUG: Wrap metric to trace calls
+            # DEBUG: Wrap metric to trace calls. Evaluate calls the metric from
+            # its worker threads when num_threads > 1, so the counter is locked
             call_count = {'count': 0}
+            call_count_lock = threading.Lock()
             original_metric = metric
 
             def traced_metric(example, prediction, trace=None):
-                call_count['count'] += 1
-                logger.debug(f"Metric called #{call_count['count']}")
+                with call_count_lock:
+                    call_count['count'] += 1
+                    call_number = call_count['count']
+                if not debug:
+                    return original_metric(example, prediction, trace)
+
+                logger.debug(f"Metric called #{call_number}")
                 logger.debug(f"  Prediction type: {type(prediction)}")
                 logger.debug(f"  Has first_action: {hasattr(prediction, 'first_action')}")
                 result = original_metric(example, prediction, trace)
@@ -569,22 +686,24 @@ class PromptOptimizer:
             )
 
             # Run evaluation - cache has been cleared, so will make fresh LLM calls
-            logger.info(f"Starting evaluation of {len(examples)} examples with student model...")
+            logger.info(f"Starting evaluation of {len(examples)} examples with student model ({num_threads} threads)...")
 
             # Track calls using DSPy's LM history (LiteLLM callbacks don't work with DSPy)
             # IMPORTANT: Use self.student.history, not dspy.settings.lm.history
             # because dspy.settings.lm might be None before the context manager
             history_before = len(self.student.history) if hasattr(self.student, 'history') else 0
-            logger.debug(f"Student LM history before evaluation: {history_before}")
+            if debug:
+                logger.debug(f"Student LM history before evaluation: {history_before}")
 
             # Run evaluation
             try:
-                logger.debug(f"About to call evaluator on fresh_module...")
-                logger.debug(f"  Module type: {type(fresh_module)}")
-                logger.debug(f"  Module has forward: {hasattr(fresh_module, 'forward')}")
+                if debug:
+                    logger.debug(f"About to call evaluator on fresh_module...")
+                    logger.debug(f"  Module type: {type(fresh_module)}")
+                    logger.debug(f"  Module has forward: {hasattr(fresh_module, 'forward')}")
 
                 # Check module predictor states
-                if hasattr(fresh_module, 'named_predictors'):
+                if debug and hasattr(fresh_module, 'named_predictors'):
                     for name, pred in fresh_module.named_predictors():
                         logger.debug(f"  Predictor '{name}': type={type(pred)}, has demos={hasattr(pred, 'demos')}")
                         if hasattr(pred, 'demos') and pred.demos:
@@ -592,13 +711,15 @@ class PromptOptimizer:
                         if hasattr(pred, '_compiled'):
                             logger.debug(f"    -> _compiled={pred._compiled}")
 
-                logger.debug(f"  Evaluator type: {type(evaluator)}")
-                logger.debug(f"  Evaluator devset size: {len(evaluator.devset)}")
+                if debug:
+                    logger.debug(f"  Evaluator type: {type(evaluator)}")
+                    logger.debug(f"  Evaluator devset size: {len(evaluator.devset)}")
                 score = evaluator(fresh_module)
-                logger.debug(f"Evaluator returned: {score}")
-                logger.debug(f"  Score type: {type(score)}")
-                logger.debug(f"  Score value: {score}")
-                if hasattr(score, 'results') and score.results:
+                if debug:
+                    logger.debug(f"Evaluator returned: {score}")
+                    logger.debug(f"  Score type: {type(score)}")
+                    logger.debug(f"  Score value: {score}")
+                if debug and hasattr(score, 'results') and score.results:
                     logger.debug(f"  First result: {score.results[0]}")
                     first_result = score.results[0]
                     if hasattr(first_result, '__dict__'):
@@ -612,7 +733,8 @@ class PromptOptimizer:
             # Count actual LLM calls made
             history_after = len(self.student.history) if hasattr(self.student, 'history') else 0
             num_calls = history_after - history_before
-            logger.debug(f"Student LM history after evaluation: {history_after}")
+            if debug:
+                logger.debug(f"Student LM history after evaluation: {history_after}")
 
             # Extract numeric score
             numeric_score = extract_score_value(score)
@@ -620,11 +742,6 @@ class PromptOptimizer:
             # DEBUG: Report metric calls
             logger.info(f"Evaluation complete: score={numeric_score:.3f}, metric called {call_count['count']} times, made {num_calls} LLM calls")
 
-        # Restore original temperature
-        if original_student_temp == 0.0:
-            self.student.kwargs['temperature'] = original_student_temp
-            logger.debug(f"Restored student temperature to {original_student_temp}")
-
         return {
             "score": numeric_score,
             "num_examples": len(examples)
@@ -633,37 +750,54 @@ class PromptOptimizer:
     def evaluate_baseline(
         self,
         examples: list,
-        metric: Callable
+        metric: Callable,
+        num_threads: Optional[int] = None
     ) -> dict:
         """
         Evaluate baseline (unoptimized) agent.
 
+        The baseline depends only on the student model, the examples and the
+        metric, so repeat calls with the same inputs reuse the first result.
+
         Args:
             examples: Examples to evaluate
             metric: Evaluation metric
+            num_threads: Parallel evaluation threads (defaults to self.num_threads)
 
         Returns:
             Dictionary with baseline results
         """
+        key = (self.student.model, _examples_fingerprint(examples), metric)
+        cached = self._baseline_cache.get(key)
+        if cached is not None:
+            logger.info(f"Reusing baseline result for {len(examples)} examples (score={cached['score']:.3f})")
+            return dict(cached)
+
         logger.info("Evaluating baseline agent (should use STUDENT model)...")
 
         baseline = OpenCodeAgent()
-        return self._evaluate_on_student(baseline, examples, metric)
+        results = self._evaluate_on_student(baseline, examples, metric, num_threads=num_threads)
+        self._baseline_cache[key] = results
+        return dict(results)
 
 
 class ExperimentTracker:
     """Track optimization experiments and results."""
 
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, log_filename: str = "experiment_log.jsonl"):
         """
         Initialize tracker.
 
         Args:
             output_dir: Directory to save experiment results
+            log_filename: JSONL file each logged experiment is appended to
+                (kept across runs, and written before save_results is called)
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.output_dir / log_filename
         self.results = []
+        self._best: Optional[dict] = None  # Highest improvement so far (first on ties)
 
     def log_experiment(
         self,
@@ -696,11 +830,26 @@ class ExperimentTracker:
         }
 
         self.results.append(result)
+        if self._best is None or result['improvement'] > self._best['improvement']:
+            self._best = result
+        self._append_log(result)
         logger.info(
             f"Experiment '{name}': baseline={baseline_score:.3f}, "
             f"optimized={optimized_score:.3f}, improvement={result['improvement']:.3f}"
         )
 
+    def _append_log(self, result: dict):
+        """Append one experiment as a JSON line to the log file."""
+        try:
+            if orjson is not None:
+                line = orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+            else:
+                line = (json.dumps(result, ensure_ascii=False) + "\n").encode('utf-8')
+            with open(self.log_path, 'ab') as f:
+                f.write(line)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not append experiment to {self.log_path}: {e}")
+
     def save_results(self, filename: str = "experiment_results.json"):
         """
         Save results to JSON file.
@@ -708,11 +857,13 @@ class ExperimentTracker:
         Args:
             filename: Output filename
         """
-        import json
-
         output_path = self.output_dir / filename
-        with open(output_path, 'w') as f:
-            json.dump(self.results, f, indent=2)
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(self.results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(self.results, f, indent=2)
 
         logger.info(f"Saved experiment results to {output_path}")
 
@@ -723,7 +874,4 @@ class ExperimentTracker:
         Returns:
             Best experiment dict or None
         """
-        if not self.results:
-            return None
-
-        return max(self.results, key=lambda x: x['improvement'])
+        return self._best